@@ -1,32 +1,36 @@
 class Chemistry:
-    #given from NASA chem
-    aeat = None # area of exit/area of throat
-    rho = None #density
-    h = None #enthalpy
-    s = None #entropy
-    gam = None #molar heat capacity
-    g = None #gibb's free energy
-    u = None #internal energy
-    m = None #molar mass
-    mw = None #molecular weight = 1/m
-    p = None #pressure in bar... is converted to Pa in rocket
-    son = None #speed of sound
-    cp = None #specific heat capacity (constant pressure)
-    t = None #temperature
-    ae = None #exit area
-    cf = None #function of nozzle
-    ivac = None #specific impulse (exit velocity) if the rocket were in space
-    mach = None #mach number
-    pip = None #pressure ratio to chamber
-    isp = None #the exhaust velocity of the gas (m/s)
-
-    #calculated from self chem (calcs called in parse_initVeriables)
-    rbar = None # Gas Constant per molecular weight (specific R) in kJ
-
-    #calculated from other chems
-    a = None #area
-    d = None #diameter
-    
+    # one station of a CEA output table, __slots__ keeps it a small fixed record
+    __slots__ = ('aeat', 'rho', 'h', 's', 'gam', 'g', 'u', 'm', 'mw', 'p', 'son', 'cp', 't', 'ae', 'cf', 'ivac', 'mach', 'pip', 'isp', 'rbar', 'a', 'd')
+
+    def __init__(self):
+        #given from NASA chem
+        self.aeat = None # area of exit/area of throat
+        self.rho = None #density
+        self.h = None #enthalpy
+        self.s = None #entropy
+        self.gam = None #molar heat capacity
+        self.g = None #gibb's free energy
+        self.u = None #internal energy
+        self.m = None #molar mass
+        self.mw = None #molecular weight = 1/m
+        self.p = None #pressure in bar... is converted to Pa in rocket
+        self.son = None #speed of sound
+        self.cp = None #specific heat capacity (constant pressure)
+        self.t = None #temperature
+        self.ae = None #exit area
+        self.cf = None #function of nozzle
+        self.ivac = None #specific impulse (exit velocity) if the rocket were in space
+        self.mach = None #mach number
+        self.pip = None #pressure ratio to chamber
+        self.isp = None #the exhaust velocity of the gas (m/s)
+
+        #calculated from self chem (calcs called in parse_initVeriables)
+        self.rbar = None # Gas Constant per molecular weight (specific R) in kJ
+
+        #calculated from other chems
+        self.a = None #area
+        self.d = None #diameter
+
     def initCalculations(self):
         self.rbar = 8.31446261815324 / self.m * 1000 #ADD TO MAIN
 
@@ -51,6 +55,8 @@ class Chemistry:
 
                 for val in line.split():
                     # dynamic access to 'Chemistry's fields based on the ordering stored in 'names'
+                    if names[i] not in Chemistry.__slots__:
+                        raise Exception(f"Unknown field {names[i]}")
                     r.__setattr__(names[i], float(val))
                     i += 1
 
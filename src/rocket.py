@@ -1,20 +1,14 @@
 import math
 
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
-import time
-from scipy.optimize import fsolve
+from ..src_cea.machTables import solveMachTable
+from ..src_cea.contour import ContourGeometry
+from ..src_cea.heatLoad import HeatLoadIntegrator
+from ..src_cea.stationKernels import isentropicStations, bartzSimple as bartz, heatFlux
 # input values
 # mdot #total mass flowrate into engine (kg/s)
 # Lstar #characteristic length (m)
 
-def bartz(d_throat, p_chamber, c_star, d, c_p, visc, t_gas, t_wall):
-    """bartz equation calculator"""
-    t_boundary = (t_gas + t_wall) / 2
-    return (0.026 / math.pow(d_throat, 0.2) * math.pow((p_chamber / c_star), 0.8) * math.pow((d_throat / d),
-         1.8) * c_p * math.pow(visc, 0.2) * math.pow((t_gas / t_boundary), (0.8 - 0.2 * 0.6)))
-
 # chamber diameter(0.08m), lambda curve, 15degree nozzle.
 
 def throatAreaEquation(mdot, pres, temp, rbar, gam): 
@@ -45,6 +39,8 @@ class Rocket:
         self.conv_angle = conv_angle
         self.divergence_angle = div_angle
         self.total_watts = 0
+        self.heat_load_arr = None
+        self.region_watts = {}
         self.r1 = r1
         self.r2 = r2
         self.r3 = r3
@@ -121,7 +117,8 @@ class Rocket:
             #print('n variable: {}'.format(n))
             #print('e variable: {}'.format(e))
             contourPoints = [a, b, c, d, o, n, e] # temporary
-            nozzleCurve = lambda x: ((contourPoints[5][1] - contourPoints[6][1]) / (contourPoints[5][0] - contourPoints[6][0]))  * (x - contourPoints[5][0]) + contourPoints[5][1]
+            thetaN = self.divergence_angle
+            X = None # straight line from n to e
 
         elif self.nozzle_type == 'bell80': # this sets the points and equations for an 80% bell nozzle
             r3 = self.r3 * self.thr.d/2
@@ -148,7 +145,6 @@ class Rocket:
             #print('B variable: {}'.format(B))
             #print('X variable: {}'.format(X))
             #print('a: {}\nb: {}\nc: {}'.format(aa,bb,cc))
-            nozzleCurve = lambda x: (-X[1] + (X[1]**2 - 4 * X[0] * (X[2]-x))**0.5) / (2*X[0]) # might need to change sign
 
         elif self.nozzle_type == 'dualbell': #work in progress, this sets the points and equations for a duel bell nozzle, in this there is an extra point 'm' between the n and e points
             r3 = self.r3 * self.thr.d/2
@@ -186,25 +182,8 @@ class Rocket:
             print("invalid nozzle type")
         
 
-        functions = [
-            lambda x: contourPoints[0][1],
-            lambda x: np.sqrt(r1 ** 2 - (x - contourPoints[1][0]) ** 2) + contourPoints[1][1] - r1,
-            lambda x: ((contourPoints[2][1] - contourPoints[3][1]) / (contourPoints[2][0] - contourPoints[3][0]))  * (x - contourPoints[2][0]) + contourPoints[2][1],
-            lambda x: -np.sqrt(r2 ** 2 - (x - contourPoints[4][0]) ** 2) + contourPoints[4][1] + r2, 
-            lambda x: -np.sqrt(r3 ** 2 - (x + contourPoints[4][0]) ** 2) + contourPoints[4][1] + r3, 
-            nozzleCurve
-        ]
-        num = np.int32(np.rint((contourPoints[6][0] - contourPoints[0][0]) / self.contourStep))
-        x = np.array([])
-        y = np.array([])
-        for i, fun in enumerate(functions):
-            temp_x = np.linspace(contourPoints[i][0], contourPoints[i + 1][0], num)
-            f = np.vectorize(fun)
-            #if i == 5:
-            #    print('x:{}\ty:{}'.format(temp_x,f(temp_x)))
-            y = np.append(y, f(temp_x))
-            x = np.append(x, temp_x)
-        contour = np.array([x, y])
+        self.geometry = ContourGeometry(contourPoints, r1, r2, r3, self.conv_angle, thetaN, X)
+        contour = self.geometry.sample(self.contourStep)
 
         #exports contour points for use in cad
         locs = ['inj', 'b', 'c', 'd', 'o', 'n', 'e']
@@ -274,55 +253,19 @@ class Rocket:
         return area_arr
 
     def solveMach(self):
-        def solveMatchForAreaRatio(area_ratio, mach_guess=0.7):
-            def machEqn(mach):
-                # return mach * area_ratio + 10
-                return ( 2 / (self.thr.gam + 1) * ( 1 + (self.thr.gam - 1)/2 * mach**2 ))**((self.thr.gam+1)/(2*(self.thr.gam-1))) - mach * area_ratio
-            
-            return fsolve(machEqn, mach_guess)
-
-        last = 0.7
-        for [x, area] in self.area_arr.transpose():
-            if x > 0:
-                last = last + 1
-            [mach] = solveMatchForAreaRatio(area/self.thr.a, last)
-            self.mach_arr.append([x, mach])
-            last = mach
-        self.mach_arr = np.array(self.mach_arr).transpose()
-
-    def temp_eq(self, mach):#NOTE: stagnation values need improvment
-        gam = self.thr.gam
-        #t_stag = self.cham.t * (1 + ((gam-1)/2 * self.cham.mach**2))
+        mach, self.mach_iterations, self.mach_converged = solveMachTable(self.area_arr[1,:]/self.thr.a, self.thr.gam)
+        self.mach_arr = np.array([self.area_arr[0,:], mach])
+
+    def stagnation(self):#NOTE: stagnation values need improvment
         # Note: ok technically, yes, the stagnation temperature needs to account for
         # gas velocity, but in our assumptions, t_0 assumed == t_cham as given by CEA
-
-        t_stag = self.inj.t
-        myreturn = t_stag * (1 + ((gam-1)/2 * mach**2))**(-1)
-        return myreturn
-
-    def pressure_eq(self, mach):
-        gam = self.thr.gam
-        #p_stag = self.cham.p * (1 + ((gam-1)/2 * self.cham.mach**2))**(gam/(gam-1))
-        p_stag = self.inj.p
-        myreturn = p_stag * (1 + ((gam-1)/2 * mach**2))**(-gam/(gam-1))
-        return myreturn
-
-    def density_eq(self, mach):#need to find chamber density
-        gam = self.cham.gam
-        d_stag = self.cham.rho * (1 + ((gam-1)/2 * self.cham.mach**2))**(1/(gam-1))
-        myreturn = d_stag * (1 + ((gam-1)/2 * mach**2))**(-1/(gam-1))
-        return myreturn
+        return self.inj.t, self.inj.p
 
     def tempPressureDensity(self):
-        self.pressure_arr = self.mach_arr.copy()
-        self.temp_arr = self.mach_arr.copy()
-        #self.density_arr = self.mach_arr.copy()
-        count = 0
-        for mach in self.mach_arr[1,:]:
-            self.temp_arr[1,count] = self.temp_eq(mach)
-            self.pressure_arr[1,count] = self.pressure_eq(mach)
-            #self.density_arr[1,count] = self.density_eq(mach)
-            count += 1
+        t_stag, p_stag = self.stagnation()
+        temp, pressure, density = isentropicStations(self.mach_arr[1,:], self.thr.gam, t_stag, p_stag)
+        self.temp_arr = np.array([self.mach_arr[0,:], temp])
+        self.pressure_arr = np.array([self.mach_arr[0,:], pressure])
     
     def filewrite(self, filename):
         output = open(filename, "w")
@@ -335,18 +278,15 @@ class Rocket:
         output.close()
 
     def calcBartz(self):
-        self.h_g_arr = self.contour.copy()
-        for i in range(len(self.h_g_arr[0])):
-            self.h_g_arr[1,i] = bartz(self.thr.d, self.cham.p, self.Cstar, self.contour[1,i]*2, self.cham.cp*1000, 0.85452e-4, self.temp_arr[1,i], self.wall_temp)
+        h_g = bartz(self.thr.d, self.cham.p, self.Cstar, self.contour[1,:]*2, self.cham.cp*1000, 0.85452e-4, self.temp_arr[1,:], self.wall_temp)
+        self.h_g_arr = np.array([self.contour[0,:], h_g])
 
     def calcHeatFlux(self):
-        self.heat_flux_arr = self.h_g_arr.copy()
-        for i in range(len(self.heat_flux_arr[0])):
-            self.heat_flux_arr[1,i] = self.h_g_arr[1,i]*(self.temp_arr[1,i]-self.wall_temp)
+        self.heat_flux_arr = np.array([self.h_g_arr[0,:], heatFlux(self.h_g_arr[1,:], self.temp_arr[1,:], self.wall_temp)])
 
     def totalWatts(self):
-        for i in range(len(self.heat_flux_arr[0])-1):
-            self.total_watts = self.total_watts + abs(self.area_arr[0,i+1] - self.area_arr[0,i]) * self.heat_flux_arr[1,i]
+        #wall area times heat flux, the old version multiplied the flux by the axial step only
+        self.total_watts, self.heat_load_arr, self.region_watts = HeatLoadIntegrator(self.contour, self.geometry.joints).integrate(self.heat_flux_arr[1,:])
     ##################################################################
     def variablesDisplay(self):
         print("{}{}:{}".format('\033[33m', self.title, '\033[0m'))
@@ -365,6 +305,7 @@ class Rocket:
         print()
 
     def graphDisplay(self, pressure_units = 'bar', distance_units = 'in'):
+        import matplotlib.pyplot as plt # only loaded when graphs are made
         #temperature units?
         if(pressure_units == 'bar'):
             Pcon = 100000 #bar
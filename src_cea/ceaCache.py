@@ -0,0 +1,100 @@
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+'''
+content addressed cache of RunCEA.create results
+a case is keyed by a hash of everything that goes into the CEA run: propellant names, the propellant cards actually loaded
+into the CEA_Obj (so redefining a custom fuel with add_new_fuel gives new keys instead of stale results), Pc, MR, eps or
+PcOvPe, frozen, frozenAtThroat and fac_CR.
+results are kept as lists of plain {attribute: value} dicts, RunCEA.create builds fresh RunCEA objects from them every
+time so callers can change their stations (ThrustLevel does) without touching the cache.
+the in memory store is a least recently used dict, the optional disk store is one json file per case in cacheDir that is
+written to a temp file first and renamed into place, so any number of worker processes can share the same folder
+'''
+
+cacheVersion = 1 # bump when RunCEA.create changes what it stores so old disk entries are never read
+
+def cardFingerprint(cea):
+    #the propellant cards CEA_Obj will feed to CEA, falls back to the card dictionaries if the deck is not available
+    deck = getattr(cea, 'cea_deck', None)
+    if deck is None:
+        from rocketcea.cea_obj import fuelCards, oxCards
+        deck = [fuelCards.get(getattr(cea, 'fuelName', ''), None), oxCards.get(getattr(cea, 'oxName', ''), None)]
+    return hashlib.sha256(json.dumps(deck, default=str).encode()).hexdigest()
+
+def caseKey(cea, Pc, Mr, eps = None, PcOvPe = None, frozen = 0, frozenAtThroat = 0):
+    number = lambda v: None if v is None else float(v)
+    case = [cacheVersion, getattr(cea, 'propName', ''), getattr(cea, 'fuelName', ''), getattr(cea, 'oxName', ''), cardFingerprint(cea),
+        number(Pc), number(Mr), number(eps), number(PcOvPe), int(frozen), int(frozenAtThroat), number(getattr(cea, 'fac_CR', None))]
+    return hashlib.sha256(json.dumps(case).encode()).hexdigest()
+
+class CEACache:
+    def __init__(self, maxSize = 4096, cacheDir = None):
+        '''
+        maxSize is the number of cases kept in memory, least recently used cases are dropped first
+        cacheDir is optional, when given cases are also loaded from and saved to that folder
+        '''
+        self.maxSize = maxSize
+        self.cacheDir = cacheDir
+        self._cases = OrderedDict()
+        self.hits = 0 # found in memory
+        self.diskHits = 0 # found on disk
+        self.misses = 0 # had to run CEA
+        if cacheDir is not None:
+            os.makedirs(cacheDir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cacheDir, key + '.json')
+
+    def get(self, key):
+        #returns the stored list of station dicts or None
+        if key in self._cases:
+            self._cases.move_to_end(key)
+            self.hits += 1
+            return self._cases[key]
+        if self.cacheDir is not None:
+            try:
+                with open(self.path(key)) as f:
+                    stations = json.load(f)
+            except (OSError, ValueError):
+                stations = None
+            if stations is not None:
+                self.diskHits += 1
+                self.remember(key, stations)
+                return stations
+        self.misses += 1
+        return None
+
+    def put(self, key, stations):
+        self.remember(key, stations)
+        if self.cacheDir is not None:
+            fd, tmp = tempfile.mkstemp(dir=self.cacheDir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(stations, f)
+            os.replace(tmp, self.path(key))
+
+    def remember(self, key, stations):
+        self._cases[key] = stations
+        self._cases.move_to_end(key)
+        while len(self._cases) > self.maxSize:
+            self._cases.popitem(last=False)
+
+    def clear(self, disk = False):
+        self._cases.clear()
+        if disk and self.cacheDir is not None:
+            for name in os.listdir(self.cacheDir):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.cacheDir, name))
+
+    def resetStats(self):
+        self.hits = self.diskHits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.diskHits + self.misses
+        return {'hits': self.hits, 'diskHits': self.diskHits, 'misses': self.misses, 'size': len(self._cases),
+            'hitRate': (self.hits + self.diskHits) / lookups if lookups else 0.0}
+
+    def __repr__(self):
+        return f'CEACache(hits={self.hits}, diskHits={self.diskHits}, misses={self.misses}, size={len(self._cases)}, cacheDir={self.cacheDir})'
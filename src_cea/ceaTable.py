@@ -0,0 +1,150 @@
+import os
+import tempfile
+import numpy as np
+from .runCEA import RunCEA
+from .ceaCache import cardFingerprint
+'''
+precomputed CEA property grids
+CEATable.build runs CEA once for every point of a Pc x MR x eps (or Pc x MR x PcOvPe) grid and keeps the station
+properties RunCEA extracts. create() has the same signature as RunCEA.create, so a table can be handed to ThrustLevel
+and Engine as their backend and every sweep point becomes an interpolation instead of a CEA run.
+Pc and eps/PcOvPe are interpolated in log space, MR linearly.
+points outside the grid, other propellants or another frozen setting fall back to RunCEA.create
+'''
+
+tableProperties = ('t', 'p', 'gam', 'cp', 'son', 'mach', 'aeat', 'Cstar', 'rho', 'mu', 'pr', 'm', 'ivac', 'h')
+
+def propellantKey(cea):
+    return [getattr(cea, 'propName', ''), getattr(cea, 'fuelName', ''), getattr(cea, 'oxName', ''), cardFingerprint(cea)]
+
+class CEATable:
+    def __init__(self, Pc, Mr, third, values, mode = 'eps', frozen = 0, frozenAtThroat = 0, propellant = None, fac_CR = None):
+        '''
+        Pc, Mr and third are the ascending grid axes, third is eps or PcOvPe depending on mode
+        values has the shape (len(Pc), len(Mr), len(third), stations, len(tableProperties))
+        '''
+        self.Pc = np.asarray(Pc, dtype=float)
+        self.Mr = np.asarray(Mr, dtype=float)
+        self.third = np.asarray(third, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self.mode = mode
+        self.frozen = frozen
+        self.frozenAtThroat = frozenAtThroat
+        self.propellant = propellant
+        self.fac_CR = fac_CR
+        self._estimateErrors = False
+        self.lookups = 0
+        self.fallbacks = 0
+        self._interpolators = {}
+
+    @staticmethod
+    def build(cea, Pc, Mr, eps = None, PcOvPe = None, frozen = 0, frozenAtThroat = 0):
+        #give either eps or PcOvPe as the third axis
+        if (eps is None) == (PcOvPe is None):
+            raise ValueError('CEATable.build needs exactly one of eps or PcOvPe')
+        mode = 'eps' if eps is not None else 'PcOvPe'
+        Pc, Mr = np.sort(np.asarray(Pc, dtype=float)), np.sort(np.asarray(Mr, dtype=float))
+        third = np.sort(np.asarray(eps if eps is not None else PcOvPe, dtype=float))
+        values = None
+        for i, p in enumerate(Pc):
+            for j, mr in enumerate(Mr):
+                for k, x in enumerate(third):
+                    if mode == 'eps':
+                        chems = RunCEA.create(cea, p, mr, ae = x, frozen = frozen, frozenAtThroat = frozenAtThroat)
+                    else:
+                        chems = RunCEA.create(cea, p, mr, pAmbient = p / x, frozen = frozen, frozenAtThroat = frozenAtThroat)
+                    if values is None:
+                        values = np.empty((len(Pc), len(Mr), len(third), len(chems), len(tableProperties)))
+                    values[i, j, k] = [[getattr(c, name) for name in tableProperties] for c in chems]
+        return CEATable(Pc, Mr, third, values, mode, frozen, frozenAtThroat, propellantKey(cea), getattr(cea, 'fac_CR', None))
+
+    def interpolator(self, method):
+        if method not in self._interpolators:
+            from scipy.interpolate import RegularGridInterpolator
+            axes = (np.log(self.Pc), self.Mr, np.log(self.third))
+            self._interpolators[method] = RegularGridInterpolator(axes, self.values, method = method, bounds_error = False, fill_value = np.nan)
+        return self._interpolators[method]
+
+    def interpolate(self, Pc, Mr, third, method = 'linear'):
+        '''
+        Pc, Mr and third can be scalars or arrays that broadcast together
+        returns an array shaped (*broadcast shape, stations, len(tableProperties)), nan outside the grid
+        '''
+        Pc, Mr, third = np.broadcast_arrays(np.asarray(Pc, dtype=float), np.asarray(Mr, dtype=float), np.asarray(third, dtype=float))
+        points = np.stack((np.log(Pc), Mr, np.log(third)), axis=-1)
+        return self.interpolator(method)(points.reshape(-1, 3)).reshape(Pc.shape + self.values.shape[3:])
+
+    @property
+    def estimateErrors(self):
+        #when True create() attaches the estimated relative error of every property to each station
+        return self._estimateErrors
+
+    @estimateErrors.setter
+    def estimateErrors(self, value):
+        if value:
+            self.checkErrorGrid()
+        self._estimateErrors = bool(value)
+
+    def checkErrorGrid(self):
+        if min(len(self.Pc), len(self.Mr), len(self.third)) < 4:
+            raise ValueError(f'CEATable error estimate needs at least 4 points on every axis, the grid has {len(self.Pc)}x{len(self.Mr)}x{len(self.third)}')
+
+    def errorEstimate(self, Pc, Mr, third):
+        #relative difference between the linear and the cubic interpolant, same shape as interpolate
+        self.checkErrorGrid()
+        linear = self.interpolate(Pc, Mr, third, 'linear')
+        cubic = self.interpolate(Pc, Mr, third, 'cubic')
+        return np.abs(linear - cubic) / np.maximum(np.abs(cubic), 1e-300)
+
+    def matches(self, cea, frozen, frozenAtThroat):
+        return (frozen == self.frozen and frozenAtThroat == self.frozenAtThroat and getattr(cea, 'fac_CR', None) == self.fac_CR
+            and (self.propellant is None or propellantKey(cea) == list(self.propellant)))
+
+    def create(self, cea, Pc, Mr, ae = None, pAmbient = None, frozen = 0, frozenAtThroat = 0):
+        #same call and returns as RunCEA.create
+        self.lookups += 1
+        if self.mode == 'eps':
+            third = ae
+        else:
+            third = None if ae is not None or pAmbient is None else Pc / pAmbient
+        if third is None or not self.matches(cea, frozen, frozenAtThroat):
+            self.fallbacks += 1
+            return RunCEA.create(cea, Pc, Mr, ae = ae, pAmbient = pAmbient, frozen = frozen, frozenAtThroat = frozenAtThroat)
+        values = self.interpolate(Pc, Mr, third)
+        if np.isnan(values).any(): # outside the grid
+            self.fallbacks += 1
+            return RunCEA.create(cea, Pc, Mr, ae = ae, pAmbient = pAmbient, frozen = frozen, frozenAtThroat = frozenAtThroat)
+        errors = self.errorEstimate(Pc, Mr, third) if self.estimateErrors else None
+        chems = []
+        for i, station in enumerate(values):
+            rrr = RunCEA()
+            for name, value in zip(tableProperties, station):
+                setattr(rrr, name, float(value))
+            rrr.rbar = rrr.initCalculations()
+            if errors is not None:
+                rrr.error = dict(zip(tableProperties, errors[i].tolist()))
+            chems.append(rrr)
+        return chems
+
+    def save(self, path):
+        #written to a temp file first so other processes never see a half written table
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, Pc=self.Pc, Mr=self.Mr, third=self.third, values=self.values, mode=self.mode, frozen=self.frozen,
+                frozenAtThroat=self.frozenAtThroat, propellant=np.array(self.propellant if self.propellant is not None else [], dtype=str),
+                fac_CR=np.nan if self.fac_CR is None else self.fac_CR, properties=np.array(tableProperties))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            if tuple(data['properties']) != tableProperties:
+                raise ValueError(f'{path} was built with different table properties')
+            propellant = data['propellant'].tolist() or None
+            fac_CR = float(data['fac_CR'])
+            return CEATable(data['Pc'], data['Mr'], data['third'], data['values'], str(data['mode']), int(data['frozen']), int(data['frozenAtThroat']),
+                propellant, None if np.isnan(fac_CR) else fac_CR)
+
+    def __repr__(self):
+        return f'CEATable({self.mode}, Pc={len(self.Pc)}, Mr={len(self.Mr)}, {self.mode}={len(self.third)}, stations={self.values.shape[3]}, lookups={self.lookups}, fallbacks={self.fallbacks})'
@@ -0,0 +1,193 @@
+import math
+import numpy as np
+'''
+analytic chamber and nozzle contour
+the contour is made of 6 segments between the points a, b, c, d, o, n, e (see nozzleGeneration):
+    0: a-b straight chamber wall
+    1: b-c circle of radius r1
+    2: c-d straight converging line
+    3: d-o circle of radius r2 (throat upstream)
+    4: o-n circle of radius r3 (throat downstream)
+    5: n-e straight line for conical nozzles or the 80% bell parabola x = X[0]*y^2 + X[1]*y + X[2]
+ContourGeometry keeps only this piecewise definition and evaluates radius, slope, area, arc length and wall area
+at whatever x values are asked for. sample() builds the dense 2xN contour array when one is needed, giving each
+segment points in proportion to its arc length (and its turning angle for tight arcs) and writing joint points once.
+a point sitting exactly on a joint belongs to the segment before it
+'''
+
+def bellRadius(x, X):
+    #radius of the bell parabola at axial position x
+    return (-X[1] + (X[1]**2 - 4 * X[0] * (X[2]-x))**0.5) / (2*X[0])
+
+def bellArcLength(y0, y1, X):
+    #arc length along x = X[0]*y^2 + X[1]*y + X[2] between the radii y0 and y1
+    def F(y):
+        u = 2 * X[0] * y + X[1]
+        return (u * np.sqrt(1 + u**2) + np.arcsinh(u)) / (4 * X[0])
+    return np.abs(F(y1) - F(y0))
+
+def bellWallArea(y0, y1, X):
+    #surface area swept by the bell parabola between the radii y0 and y1, integral of 2*pi*y*ds
+    def F(y):
+        u = 2 * X[0] * y + X[1]
+        return ((1 + u**2)**1.5 / 3 - X[1] * (u * np.sqrt(1 + u**2) + np.arcsinh(u)) / 2) / (4 * X[0]**2)
+    return 2 * np.pi * np.abs(F(y1) - F(y0))
+
+class ContourGeometry:
+    def __init__(self, contourPoints, r1, r2, r3, conv_angle, thetaN, X = None):
+        self.contourPoints = contourPoints
+        self.r1 = r1
+        self.r2 = r2
+        self.r3 = r3
+        self.conv_angle = conv_angle
+        self.thetaN = thetaN
+        self.X = X # bell parabola constants, None for a conical nozzle
+        self.joints = np.array([p[0] for p in contourPoints])
+        a, b, c, d, o, n, e = contourPoints
+        if X is None:
+            self.yN = n[1]
+            self.yE = e[1]
+            nozzleLength = math.hypot(e[0] - n[0], e[1] - n[1])
+            nozzleTurn = 0.0
+        else:
+            self.yN = bellRadius(n[0], X)
+            self.yE = bellRadius(e[0], X)
+            nozzleLength = bellArcLength(self.yN, self.yE, X)
+            nozzleTurn = abs(math.atan(1 / (2 * X[0] * self.yN + X[1])) - math.atan(1 / (2 * X[0] * self.yE + X[1])))
+        self.lengths = np.array([b[0] - a[0], r1 * conv_angle, math.hypot(d[0] - c[0], d[1] - c[1]), r2 * conv_angle, r3 * thetaN, nozzleLength])
+        self.turns = np.array([0.0, conv_angle, 0.0, conv_angle, thetaN, nozzleTurn])
+        self.cumulativeLengths = np.concatenate(([0.0], np.cumsum(self.lengths)))
+        self.length = self.cumulativeLengths[-1]
+        self.cumulativeWallAreas = np.concatenate(([0.0], np.cumsum([self.segmentWallArea(i, self.joints[i + 1]) for i in range(6)])))
+
+    def segmentIndex(self, x):
+        return np.clip(np.searchsorted(self.joints, x, side='left') - 1, 0, 5)
+
+    def evaluate(self, x, funcs):
+        #runs funcs[i] on the x values that fall on segment i
+        x = np.asarray(x, dtype=float)
+        seg = self.segmentIndex(x)
+        out = np.empty(x.shape)
+        for i, fun in enumerate(funcs):
+            mask = seg == i
+            if mask.any():
+                out[mask] = fun(x[mask])
+        return out
+
+    def radius(self, x):
+        a, b, c, d, o, n, e = self.contourPoints
+        r1, r2, r3 = self.r1, self.r2, self.r3
+        funcs = [
+            lambda x: np.full(x.shape, a[1]),
+            lambda x: np.sqrt(r1**2 - (x - b[0])**2) + b[1] - r1,
+            lambda x: c[1] + (d[1] - c[1]) / (d[0] - c[0]) * (x - c[0]),
+            lambda x: -np.sqrt(r2**2 - (x - o[0])**2) + o[1] + r2,
+            lambda x: -np.sqrt(r3**2 - (x - o[0])**2) + o[1] + r3,
+            self.nozzleRadius,
+        ]
+        return self.evaluate(x, funcs)
+
+    def nozzleRadius(self, x):
+        n, e = self.contourPoints[5], self.contourPoints[6]
+        if self.X is None:
+            return n[1] + (e[1] - n[1]) / (e[0] - n[0]) * (x - n[0])
+        return bellRadius(x, self.X)
+
+    def slope(self, x):
+        #dr/dx
+        a, b, c, d, o, n, e = self.contourPoints
+        r1, r2, r3, X = self.r1, self.r2, self.r3, self.X
+        funcs = [
+            lambda x: np.zeros(x.shape),
+            lambda x: -(x - b[0]) / np.sqrt(r1**2 - (x - b[0])**2),
+            lambda x: np.full(x.shape, (d[1] - c[1]) / (d[0] - c[0])),
+            lambda x: (x - o[0]) / np.sqrt(r2**2 - (x - o[0])**2),
+            lambda x: (x - o[0]) / np.sqrt(r3**2 - (x - o[0])**2),
+            lambda x: np.full(x.shape, (e[1] - n[1]) / (e[0] - n[0])) if X is None else 1 / (2 * X[0] * bellRadius(x, X) + X[1]),
+        ]
+        return self.evaluate(x, funcs)
+
+    def area(self, x):
+        return np.pi * self.radius(x)**2
+
+    def segmentArcLength(self, i, x):
+        #wall length from the start of segment i to x
+        a, b, c, d, o, n, e = self.contourPoints
+        if i == 0:
+            return x - a[0]
+        if i == 1:
+            return self.r1 * np.arcsin(np.clip((x - b[0]) / self.r1, -1, 1))
+        if i == 2:
+            return (x - c[0]) * math.hypot(1, (d[1] - c[1]) / (d[0] - c[0]))
+        if i == 3:
+            return self.r2 * (self.conv_angle - np.arcsin(np.clip((o[0] - x) / self.r2, -1, 1)))
+        if i == 4:
+            return self.r3 * np.arcsin(np.clip((x - o[0]) / self.r3, -1, 1))
+        if self.X is None:
+            return (x - n[0]) * math.hypot(1, (e[1] - n[1]) / (e[0] - n[0]))
+        return bellArcLength(self.yN, bellRadius(x, self.X), self.X)
+
+    def arcLength(self, x):
+        #wall length measured from point a
+        return self.evaluate(x, [lambda x, i=i: self.cumulativeLengths[i] + self.segmentArcLength(i, x) for i in range(6)])
+
+    def segmentWallArea(self, i, x):
+        #surface area of the wall from the start of segment i to x
+        a, b, c, d, o, n, e = self.contourPoints
+        if i in (0, 2) or (i == 5 and self.X is None): # cones and cylinders
+            x0, y0 = self.contourPoints[i]
+            if i == 5:
+                y0 = self.yN
+            y = self.nozzleRadius(x) if i == 5 else self.radius(x)
+            return np.pi * (y0 + y) * np.hypot(x - x0, y - y0)
+        if i == 5:
+            return bellWallArea(self.yN, bellRadius(x, self.X), self.X)
+        # arcs, r(phi) = yc -/+ R*cos(phi) with ds = R*dphi
+        if i == 1:
+            R, yc, sign, phi0 = self.r1, b[1] - self.r1, 1, 0.0
+            phi = np.arcsin(np.clip((x - b[0]) / R, -1, 1))
+        elif i == 3:
+            R, yc, sign, phi0 = self.r2, o[1] + self.r2, -1, self.conv_angle
+            phi = np.arcsin(np.clip((o[0] - x) / R, -1, 1))
+        else:
+            R, yc, sign, phi0 = self.r3, o[1] + self.r3, -1, 0.0
+            phi = np.arcsin(np.clip((x - o[0]) / R, -1, 1))
+        return 2 * np.pi * R * np.abs(yc * (phi - phi0) + sign * R * (np.sin(phi) - np.sin(phi0)))
+
+    def wallArea(self, x):
+        #wetted wall area from point a to x, integral of 2*pi*r*ds
+        return self.evaluate(x, [lambda x, i=i: self.cumulativeWallAreas[i] + self.segmentWallArea(i, x) for i in range(6)])
+
+    def segmentSampler(self, i):
+        #returns a function giving x, y for t running from 0 to 1 along segment i
+        a, b, c, d, o, n, e = self.contourPoints
+        r1, r2, r3, conv, thetaN = self.r1, self.r2, self.r3, self.conv_angle, self.thetaN
+        if i == 0:
+            return lambda t: (a[0] + (b[0] - a[0]) * t, np.full(t.shape, a[1]))
+        if i == 1:
+            return lambda t: (b[0] + r1 * np.sin(conv * t), b[1] - r1 + r1 * np.cos(conv * t))
+        if i == 2:
+            return lambda t: (c[0] + (d[0] - c[0]) * t, c[1] + (d[1] - c[1]) * t)
+        if i == 3:
+            return lambda t: (o[0] - r2 * np.sin(conv * (1 - t)), o[1] + r2 - r2 * np.cos(conv * (1 - t)))
+        if i == 4:
+            return lambda t: (o[0] + r3 * np.sin(thetaN * t), o[1] + r3 - r3 * np.cos(thetaN * t))
+        def nozzle(t):
+            x = n[0] + (e[0] - n[0]) * t
+            return x, self.nozzleRadius(x)
+        return nozzle
+
+    def sample(self, contourStep, maxTurn = 2 * np.pi / 180):
+        '''
+        builds the 2xN [x, radius] contour array
+        contourStep is the target spacing along the wall, maxTurn caps the angle swept between two points on the arcs
+        '''
+        counts = [max(int(math.ceil(length / contourStep)), int(math.ceil(turn / maxTurn)), 1) for length, turn in zip(self.lengths, self.turns)]
+        contour = np.empty((2, 1 + sum(counts)))
+        contour[:, 0] = self.contourPoints[0]
+        start = 1
+        for i, num in enumerate(counts):
+            t = np.arange(1, num + 1) / num # the first point of every segment is the last point of the one before it
+            contour[0, start:start + num], contour[1, start:start + num] = self.segmentSampler(i)(t)
+            start += num
+        return contour
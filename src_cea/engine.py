@@ -1,29 +1,32 @@
 import math
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
 import time
-from scipy.optimize import fsolve
-from rocketcea.cea_obj import CEA_Obj, add_new_fuel
+from functools import cached_property
 # from rocketcea.cea_obj import add_new_fuel
 # from rocketcea.cea_obj_w_units import CEA_Obj
-from .archived_code.chemistryCEA import ChemistryCEA
-from .thrustLevel import ThrustLevel
+from .thrustLevel import ThrustLevel, batchHeatCalcs
+from .contour import ContourGeometry
+from .heatLoad import HeatLoadIntegrator
+from .instrumentation import span, debug
+from .throttleSolver import exitPressure, solveChamberPressure
 from .fluidProperties.fluidProperties import FluidProperties
-import time
 
 class Engine:
-    def __init__(self, title, fuel, ox, nozzle_type, Mr, pMaxCham, mdotMax, Lstar, Dcham, wall_temp, r1, r2, r3, conv_angle, fuel_delta_t, pMinExitRatio = [], filmCoolingPercent = 0, div_angle = None, contourStep = 1e-4, customFuel = None, frozen = 1, fac_CR = None, pAmbient = 1.01325, doContours = True, eta = 1):
+    def __init__(self, title, fuel, ox, nozzle_type, Mr, pMaxCham, mdotMax, Lstar, Dcham, wall_temp, r1, r2, r3, conv_angle, fuel_delta_t, pMinExitRatio = [], filmCoolingPercent = 0, div_angle = None, contourStep = 1e-4, customFuel = None, frozen = 1, fac_CR = None, pAmbient = 1.01325, doContours = True, eta = 1, backend = None, cea = None, lazy = False, profileDtype = np.float64):
         self.starttime = time.time()
         self.title = title
         self.fuel = FluidProperties(fuel)
         #print(self.fuel)
         self.ox = FluidProperties(ox)
-        if customFuel != None:
+        if customFuel != None and getattr(backend, 'needsCEA', True):
+            from rocketcea.cea_obj import add_new_fuel
             add_new_fuel( customFuel[0], customFuel[1] )
         #self.cea = CEA_Obj( oxName= ox, fuelName= fuel, isp_units='sec', cstar_units='m/s', pressure_units='bar', temperature_units='K', sonic_velocity_units='m/s', enthalpy_units='kJ/kg', density_units='kg/m^3', specific_heat_units='kJ/kg-K', viscosity_units='millipoise', thermal_cond_units='W/cm-degC', fac_CR=fac_CR, make_debug_prints=False)
         #CEA_Obj(propName='', oxName='', fuelName='', useFastLookup=0, makeOutput=0, isp_units='sec', cstar_units='ft/sec', pressure_units='psia', temperature_units='degR', sonic_velocity_units='ft/sec', enthalpy_units='BTU/lbm', density_units='lbm/cuft', specific_heat_units='BTU/lbm degR', viscosity_units='millipoise', thermal_cond_units='mcal/cm-K-s', fac_CR=None, make_debug_prints=False
-        self.cea = CEA_Obj( oxName= ox, fuelName= fuel, fac_CR=fac_CR)
+        if cea is None and getattr(backend, 'needsCEA', True):
+            from rocketcea.cea_obj import CEA_Obj # imported here so backends that do not need CEA work without rocketcea
+            cea = CEA_Obj( oxName= ox, fuelName= fuel, fac_CR=fac_CR)
+        self.cea = cea # can be passed in so sweeps reuse one CEA_Obj per propellant combination
         self.nozzle_type = nozzle_type
         self.Mr = Mr
         self.pAmbient = pAmbient
@@ -43,43 +46,100 @@ class Engine:
         self.div_angle = div_angle
         self.doContours = doContours
         self.contourStep = contourStep
-        self.contourPoints = None
-        self.contour = None
-        self.area_arr = None
         self.eta = eta
+        self.backend = backend # RunCEA (None) or anything with the same create(), e.g. a CEATable
+        self.lazy = lazy
+        self.profileDtype = profileDtype # np.float32 halves the memory of the station profiles
+        self.profiles = None
         #self.max, self.min = self.variableThrustOptimizerold()
-        st = time.time()
-        self.throttles = self.variableThrustOptimizer(pMinExitRatio)
-        et = time.time()
-        print(f'thrust level finder run time" {et-st}s')
-        self.max = self.throttles[0]
-        if len(self.throttles) > 1:
-            self.min = self.throttles[-1]
-        else:
-            self.min = None
-        self.chamber_volume = self.Lstar * self.max.thr.a
-        self.chamber_length = self.chamber_volume / (math.pi * (self.Dcham / 2) ** 2) #NOTE: make this more accurate
-        if doContours:
-            st = time.time()
-            self.contourPoints, self.contour = self.nozzleGeneration()
-            et = time.time()
-            if self.filmCoolingPercent != 0:
-                self.filmCoolingHeatCalcs()
-            print(f'contour generator run time" {et-st}s')
-            st = time.time()
-            self.area_arr = self.areas()
-            et = time.time()
-            print(f'areas run time" {et-st}s')
-            st = time.time()
-            self.bartzHeatCalcs()
-            et = time.time()
-            print(f'bartz run time" {et-st}s')
+        # every stage below is a cached property that runs on first access, lazy = True leaves all of them to be
+        # computed when they are used, so a sweep reading only thrust and isp never builds a contour
+        if not lazy:
+            with span('engine'):
+                self.throttles
+                self.chamber_length
+                if doContours:
+                    self.contour
+                    self.filmCooling
+                    self.area_arr
+                    self.heatLoad
+                    self.heatTransfer
         self.endtime = time.time()
         self.runtime = self.endtime-self.starttime
-  
+
+    # stages: thermochemistry and sizing (throttles) -> contour -> areas/heatLoad -> heatTransfer, filmCooling
+    @cached_property
+    def throttles(self):
+        #one ThrustLevel per throttle point, max thrust first: CEA runs, throat and exit sizing, thrust and isp
+        with span('thrustLevels'):
+            throttles = self.variableThrustOptimizer(self.pMinExitRatio)
+        for level in throttles:
+            level.profileDtype = self.profileDtype
+        return throttles
+
+    @property
+    def max(self):
+        return self.throttles[0]
+
+    @property
+    def min(self):
+        return self.throttles[-1] if len(self.throttles) > 1 else None
+
+    @cached_property
+    def chamber_volume(self):
+        return self.Lstar * self.max.thr.a
+
+    @cached_property
+    def chamber_length(self):
+        return self.chamber_volume / (math.pi * (self.Dcham / 2) ** 2) #NOTE: make this more accurate
+
+    @cached_property
+    def contour(self):
+        with span('contour'):
+            self.contourPoints, contour = self.nozzleGeneration() # also sets self.geometry
+        return contour
+
+    @cached_property
+    def contourPoints(self):
+        self.contour
+        return self.__dict__['contourPoints']
+
+    @cached_property
+    def geometry(self):
+        self.contour
+        return self.__dict__['geometry']
+
+    @cached_property
+    def area_arr(self):
+        with span('areas'):
+            return self.areas()
+
+    @cached_property
+    def heatLoad(self):
+        with span('areas'):
+            return HeatLoadIntegrator(self.contour, self.geometry.joints)
+
+    @cached_property
+    def filmCooling(self):
+        #film cooling mass flows and adjusted isp of every throttle, True once they are set
+        if self.filmCoolingPercent != 0:
+            self.filmCoolingHeatCalcs()
+        return self.filmCoolingPercent != 0
+
+    @cached_property
+    def heatTransfer(self):
+        #mach, station and bartz heat flux arrays and heat loads of every throttle, returns the throttles
+        with span('bartz'):
+            self.profiles = self.bartzHeatCalcs() # station profiles of every throttle, one contiguous block
+        return self.throttles
+
+    def heatFlux(self, throttle = 0):
+        #[x, heat flux W/m^2] along the contour for one throttle (0 is max thrust), runs only the stages it needs
+        return self.heatTransfer[throttle].heat_flux_arr
+
     def bartzHeatCalcs(self):
-        for i in self.throttles:
-            i.heatCalcs(self.area_arr, self.contour, self.wall_temp, self.Mr)
+        #every throttle level in one batched pass over the shared contour, returns their StationProfiles
+        return batchHeatCalcs(self.throttles, self.area_arr, self.contour, self.wall_temp, self.Mr, self.heatLoad)
         # self.max.heatCalcs(self.area_arr, self.contour, self.wall_temp, self.fuel_delta_t, self.fuel, self.Mr, self.filmCoolingPercent)
         # self.min.heatCalcs(self.area_arr, self.contour, self.wall_temp, self.fuel_delta_t, self.fuel, self.Mr, self.filmCoolingPercent)
     def filmCoolingHeatCalcs(self): 
@@ -87,52 +147,34 @@ class Engine:
         #self.max.heatCalcsFilmCooling()
         for i in self.throttles:
             i.filmCoolingCalcs(self.fuel_delta_t, self.fuel, self.filmCoolingPercent)
-    def throttleLevelCalculator(self, pthrottles, ae):
-        #print('pressure ratio:{}'.format(pMin))
-        #pMin *= 1.013
-        pGuess = 0.0
+    def throttleLevelCalculator(self, pthrottles, ae, pressureRatio = None):
+        #finds the chamber pressure giving each throttle exit pressure, mass flow scales with chamber pressure
+        #pressureRatio is exit/chamber pressure of a known point on this nozzle, used for the first guess
         throttles = []
         if type(pthrottles) != list:
             pthrottles = [pthrottles]
+        pExit = lambda Pc: exitPressure(self.cea, Pc, self.Mr, ae, self.frozen, self.backend)
+        self.throttle_cea_calls = 0
         for pthrottle in pthrottles:
-            cpGuess = self.pMaxCham
-            print(cpGuess, self.pMaxCham)
-            cpStep = cpGuess
-            mdotGuess = self.mdotMax
-            mdotStep = mdotGuess
-            pGuess = 0.0
-            while abs(pGuess-pthrottle) > 0.0001:
-                #print('cpGuess:{}\ncpStep:{}\nmdotGuess:{}\nmdotStep:{}\npGuess:{}\nminExitPressure:{}'.format(cpGuess, cpStep, mdotGuess, mdotStep, pGuess, pMin))
-                if pGuess != 0:
-                    cpStep /= 2
-                    mdotStep /= 2
-                    if pGuess < pthrottle:
-                        cpGuess += cpStep
-                        mdotGuess += mdotStep
-                    else:
-                        cpGuess -= cpStep
-                        mdotGuess -= mdotStep
-                #print('chamber pressure:{}\nmr:{}\nmdot:{}\narea array:{}\nae:{}'.format(cpGuess, self.Mr, mdotGuess, self.area_arr, ae))
-                nozmin = ThrustLevel(self.fuel, self.cea, cpGuess, self.Mr, mdotGuess, self.area_arr, ae = ae, frozen = self.frozen, pAmbient = self.pAmbient, eta = self.eta)
-                pGuess = nozmin.exit.p
-                #print('pressure guess:{}'.format(pGuess))
-            #print('min nozzle exit pressure in bar: {}'.format(nozmin.exit.p))
-            print('break ------------------------------------------------------')
-            throttles.append(nozmin)
-        #print(throttles)
+            cpGuess = self.pMaxCham if pressureRatio is None else pthrottle / pressureRatio
+            with span('throttleSolver'):
+                cp, pe, calls = solveChamberPressure(pExit, pthrottle, cpGuess)
+            self.throttle_cea_calls += calls
+            pressureRatio = pe / cp # warm start for the next throttle point
+            mdot = self.mdotMax * cp / self.pMaxCham
+            with span('thrustLevel'):
+                throttles.append(ThrustLevel(self.fuel, self.cea, cp, self.Mr, mdot, None, ae = ae, frozen = self.frozen, pAmbient = self.pAmbient, eta = self.eta, backend = self.backend))
         return throttles
     def variableThrustOptimizer(self, pMinExitRatio):
 
         if self.nozzle_type == 'bell80' or 'conical':
-            st = time.time()
-            nozmax = ThrustLevel(self.fuel, self.cea, self.pMaxCham, self.Mr, self.mdotMax, self.area_arr, pAmbient = self.pAmbient, frozen = self.frozen, eta = self.eta)
-            et = time.time()
-            print(f'ThrustLevel runtime" {et-st}s')
+            with span('thrustLevel'):
+                nozmax = ThrustLevel(self.fuel, self.cea, self.pMaxCham, self.Mr, self.mdotMax, None, pAmbient = self.pAmbient, frozen = self.frozen, eta = self.eta, backend = self.backend)
             if pMinExitRatio == None or pMinExitRatio == []:
                 nozmins = []
                 #print('no min throttle pressure given. skipping throttle calculations')
             else:
-                nozmins = self.throttleLevelCalculator(pMinExitRatio, nozmax.exit.aeat)
+                nozmins = self.throttleLevelCalculator(pMinExitRatio, nozmax.exit.aeat, nozmax.exit.p / nozmax.cham.p)
             nozmins.insert(0, nozmax)
             return nozmins
             '''
@@ -151,7 +193,7 @@ class Engine:
     def variableThrustOptimizerold(self):
 
         if self.nozzle_type == 'bell80' or 'conical':
-            nozmax = ThrustLevel(self.fuel, self.cea, self.pMaxCham, self.Mr, self.mdotMax, self.area_arr, pAmbient = self.pAmbient, frozen = self.frozen, eta = self.eta)
+            nozmax = ThrustLevel(self.fuel, self.cea, self.pMaxCham, self.Mr, self.mdotMax, None, pAmbient = self.pAmbient, frozen = self.frozen, eta = self.eta, backend = self.backend)
             if self.pMinExitRatio == None or self.pMinExitRatio == []:
                 nozmin = None
                 #print('no min throttle pressure given. skipping throttle calculations')
@@ -174,7 +216,8 @@ class Engine:
             n = [r3 * np.sin(self.div_angle), o[1] + r3 * np.sin(1 - np.cos(self.div_angle))]
             e = [n[0] + ((self.max.exit.d / 2) - n[1]) * np.sin(math.pi/2 - self.div_angle)/np.sin(self.div_angle), self.max.exit.d / 2]
             contourPoints = [a, b, c, d, o, n, e] # temporary
-            nozzleCurve = lambda x: ((contourPoints[5][1] - contourPoints[6][1]) / (contourPoints[5][0] - contourPoints[6][0]))  * (x - contourPoints[5][0]) + contourPoints[5][1]
+            thetaN = self.div_angle
+            X = None # straight line from n to e
 
         elif self.nozzle_type == 'bell80': # this sets the points and equations for an 80% bell nozzle
             r3 = self.r3 * self.max.thr.d/2
@@ -192,8 +235,7 @@ class Engine:
             aa = X[0]
             bb = X[1]
             cc = X[2]
-            print(f'bell parabola constants\na = {aa}\nb = {bb}\nc = {cc}')
-            nozzleCurve = lambda x: (-X[1] + (X[1]**2 - 4 * X[0] * (X[2]-x))**0.5) / (2*X[0]) # might need to change sign
+            debug(f'bell parabola constants\na = {aa}\nb = {bb}\nc = {cc}')
 
             '''
         elif self.nozzle_type == 'dualbell': #work in progress, this sets the points and equations for a duel bell nozzle, in this there is an extra point 'm' between the n and e points
@@ -237,25 +279,8 @@ class Engine:
         else: #this runs if the nozzle type input does not match any of the above nozzle types
             print("invalid nozzle type")
 
-        functions = [
-            lambda x: contourPoints[0][1],
-            lambda x: np.sqrt(r1 ** 2 - (x - contourPoints[1][0]) ** 2) + contourPoints[1][1] - r1,
-            lambda x: ((contourPoints[2][1] - contourPoints[3][1]) / (contourPoints[2][0] - contourPoints[3][0]))  * (x - contourPoints[2][0]) + contourPoints[2][1],
-            lambda x: -np.sqrt(r2 ** 2 - (x - contourPoints[4][0]) ** 2) + contourPoints[4][1] + r2, 
-            lambda x: -np.sqrt(r3 ** 2 - (x + contourPoints[4][0]) ** 2) + contourPoints[4][1] + r3, 
-            nozzleCurve
-        ]
-        num = np.int32(np.rint((contourPoints[6][0] - contourPoints[0][0]) / self.contourStep))
-        x = np.array([])
-        y = np.array([])
-        for i, fun in enumerate(functions):
-            temp_x = np.linspace(contourPoints[i][0], contourPoints[i + 1][0], num)
-            f = np.vectorize(fun)
-            #if i == 5:
-            #    print('x:{}\ty:{}'.format(temp_x,f(temp_x)))
-            y = np.append(y, f(temp_x))
-            x = np.append(x, temp_x)
-        contour = np.array([x, y])
+        self.geometry = ContourGeometry(contourPoints, r1, r2, r3, self.conv_angle, thetaN, X)
+        contour = self.geometry.sample(self.contourStep)
 
         #exports contour points for use in cad: 
         #NOTE: commented out because it can be made as a seperate export function as to speed up code runtime
@@ -271,23 +296,24 @@ class Engine:
         return contourPoints, contour
     def areas(self):
         area_arr = self.contour.copy()
-        area_arr[1,:] = (area_arr[1,:] ** 2) * np.pi# this is just pi*r^2 in array form
+        area_arr[1,:] = self.geometry.area(area_arr[0,:]) # pi*r^2 from the analytic contour
         return area_arr
 
 ########################################################################################################################################################################
-    def filewrite(self, filename): #needs update
-        output = open(filename, "w")
-        offset = self.contour[0,0]
-        for i in range(len(self.contour[0])):
-            self.contour[0,i] += -offset
-        output.write("X,Y,MACH,TEMP,Pressure,h_g,FLUX\n")
-        for i in range(len(self.contour[1,:])):
-            output.write("{:.4f},{:.4f},{:.4f},{:.4f},{:.4f},{:.4f},{:.4f}\n".format(self.contour[0,i], self.contour[1,i], self.max.mach_arr[1,i], self.max.temp_arr[1,i], self.max.pressure_arr[1,i], self.max.h_g_arr[1,i], self.max.heat_flux_arr[1,i]))
-        output.close()
+    def filewrite(self, filename):
+        #max thrust station profiles as csv, x measured from the injector face (the contour itself is left as it is)
+        self.heatTransfer
+        profiles = self.max.profiles
+        table = np.column_stack((self.contour[0,:] - self.contour[0,0], self.contour[1,:], profiles.get('mach'), profiles.get('temp'),
+            profiles.get('pressure'), profiles.get('h_g'), profiles.get('heat_flux')))
+        np.savetxt(filename, table, fmt='%.4f', delimiter=',', header='X,Y,MACH,TEMP,Pressure,h_g,FLUX', comments='')
 ###############################
 
     #printing veriables
     def variablesDisplay(self, minthrust = False, allthrust = False):
+        self.filmCooling
+        if self.doContours:
+            self.heatTransfer
         print("{}{}:{}".format('\033[33m', self.title, '\033[0m'))
         print("Propellants:{}, {}".format(self.fuel.name, self.ox.name))
         print("Chamber Length: {0:.3f} in".format(self.chamber_length / 0.0254))
@@ -342,6 +368,8 @@ class Engine:
         print(f'exit values: {self.max.exit}')
         print(f'raw cea output: {self.max.cham.raw_cea_output}')
     def graphDisplay(self, minthrust = False, allthrust = False):
+        if self.doContours:
+            self.heatTransfer
         self.max.graphDisplay()
         if minthrust:
             if self.min != None:
@@ -1,12 +1,12 @@
-import math
+import itertools
 from .engine import Engine
-import pandas as pd
-from rocketcea.cea_obj import CEA_Obj, add_new_fuel
+from .sweepRunner import runCases
+from .sweepResults import SweepResults, stationSummary
+from .instrumentation import debug
 from .fluidProperties.fluidProperties import FluidProperties
-import plotly.express as px
 
 class EngineAnalyzer:
-    def __init__(self, title, fuel, ox, nozzle_type, Mr, pMaxCham, mdotMax, Lstar, Dcham, wall_temp, r1, r2, r3, conv_angle, fuel_delta_t, pMinExitRatio = [], filmCoolingPercent = [], div_angle = None, contourStep = 5e-3, customFuel = None, frozen = [0], fac_CR = None, pAmbient = [1.01325], doContours = True, eta = 1):
+    def __init__(self, title, fuel, ox, nozzle_type, Mr, pMaxCham, mdotMax, Lstar, Dcham, wall_temp, r1, r2, r3, conv_angle, fuel_delta_t, pMinExitRatio = [], filmCoolingPercent = [], div_angle = None, contourStep = 5e-3, customFuel = None, frozen = [0], fac_CR = None, pAmbient = [1.01325], doContours = True, eta = 1, workers = 1, chunksize = None, checkpoint = None, backend = None):
         self.title = title
         self.fuel = FluidProperties(fuel) #CEA
         self.ox = FluidProperties(ox) #CEA
@@ -31,9 +31,10 @@ class EngineAnalyzer:
         self.step = contourStep #no
         self.doContours = doContours
         self.eta = eta
+        self.backend = backend # RunCEA (None) or anything with the same create(), e.g. IdealGasBackend or a CEATable
         #basic calcs, sizing calcs, contour calcs, heat calcs, cooling calcs
         #varsToSweep = [list(fuel), list(ox), list(nozzle_type), list(Mr), list(pMaxCham), list(mdotMax), list(frozen), list(pAmbient), [0], [0], [0], [0], [0], [0]]
-        varsToSweeptemp = [fuel, ox, nozzle_type, Mr, pMaxCham, mdotMax, frozen, pAmbient, eta, [None], [None], [None], [None], [None], [None]]
+        varsToSweeptemp = [fuel, ox, nozzle_type, Mr, pMaxCham, mdotMax, frozen, pAmbient, eta]
         varsToSweep = []
         for el in varsToSweeptemp:
             if type(el) != list:
@@ -41,27 +42,27 @@ class EngineAnalyzer:
             else:
                 varsToSweep.append(el)
 
-        print(varsToSweep)
+        debug(varsToSweep)
         inputNames = ['fuel', 'ox', 'nozzle_type', 'Mr', 'pMaxCham', 'mdotMax', 'frozen', 'pAmbient', 'eta']
-        outputNames = ['thrust', 'isp_s', 'inj', 'cham', 'thr', 'exit']
-        names = inputNames+outputNames
-        enginesDBtemp = pd.MultiIndex.from_product(varsToSweep, names=names)
-        enginesDB = enginesDBtemp.to_frame(index=False)
-        
-        #print(enginesDB)   #prints input db
+        inputs = [dict(zip(inputNames, values)) for values in itertools.product(*varsToSweep)]
 
-        for i, row in enginesDB.iterrows():
-            tempEng = Engine(title, row['fuel'], row['ox'], row['nozzle_type'], row['Mr'], row['pMaxCham'], row['mdotMax'], Lstar, Dcham, wall_temp, r1, r2, r3, conv_angle, fuel_delta_t, pMinExitRatio = pMinExitRatio, filmCoolingPercent = filmCoolingPercent, contourStep = contourStep, customFuel = customFuel, frozen = row['frozen'], pAmbient = row['pAmbient'], doContours = doContours, eta = row['eta'])
-            enginesDB.loc[i,'thrust'] = tempEng.max.thrust
-            enginesDB.loc[i,'isp_s'] = tempEng.max.isp_s
-            enginesDB.loc[i,'inj'] = tempEng.max.inj
-            enginesDB.loc[i,'cham'] = tempEng.max.cham
-            enginesDB.loc[i,'thr'] = tempEng.max.thr
-            enginesDB.loc[i,'exit'] = tempEng.max.exit
+        cases = []
+        for row in inputs:
+            cases.append(dict(title = title, fuel = row['fuel'], ox = row['ox'], nozzle_type = row['nozzle_type'], Mr = row['Mr'], pMaxCham = row['pMaxCham'], mdotMax = row['mdotMax'], Lstar = Lstar, Dcham = Dcham, wall_temp = wall_temp, r1 = r1, r2 = r2, r3 = r3, conv_angle = conv_angle, fuel_delta_t = fuel_delta_t, pMinExitRatio = pMinExitRatio, filmCoolingPercent = filmCoolingPercent, contourStep = contourStep, customFuel = customFuel, frozen = row['frozen'], pAmbient = row['pAmbient'], doContours = doContours, eta = row['eta'], backend = backend, lazy = True))
+        # lazy engines only run the stages stationSummary reads, workers > 1 runs the cases in that many processes, checkpoint is a log file that lets an interrupted sweep resume, see sweepRunner
+        results = runCases(cases, workers, chunksize, collect = stationSummary, log = checkpoint)
+        for i, result in enumerate(results):
+            if not result['ok']:
+                print(f"case {i} failed: {result['error']}")
+        # one float64 column per output and station property, see sweepResults
+        self.results = SweepResults.fromCases(inputs, results, inputNames)
 
-        print(enginesDB)    #prints output db
-
-        # df = px.data.gapminder().query("country=='Canada'")
-        # fig = px.line(df, x="year", y="lifeExp", title='Life expectancy in Canada')
-        # fig.show()
+        try:
+            print(self.results.toFrame())
+        except ImportError: # pandas is optional, the column ranges still show what the sweep found
+            print(self.results.summary())
 
+    @property
+    def enginesDB(self):
+        #the results as a pandas DataFrame
+        return self.results.toFrame()
@@ -0,0 +1,207 @@
+import numpy as np
+from .sweepRunner import runCases
+from .sweepResults import SweepResults
+from .instrumentation import debug
+'''
+constrained design search over continuous Engine inputs
+instead of running every point of a grid, EngineOptimizer starts from a latin hypercube sample and then repeatedly fits
+radial basis function surrogates of the objective and of every constrained output, proposes a batch of candidates
+around the best design so far (a trust region that grows after improvements and shrinks after misses) and runs the
+batch through sweepRunner, so the engines of a batch are built in parallel with workers > 1.
+    opt = EngineOptimizer(base, {'Mr': (1.4, 2.6), 'pMaxCham': (20, 60)}, objective = 'isp_s',
+        constraints = {'total_watts': (None, 2e5), 'exit_d': (None, 0.08)}, workers = 4)
+    best = opt.run(budget = 200)
+base holds the fixed Engine arguments, discrete inputs (frozen, nozzle_type, ...) are fixed there as well.
+objective and constraints name designSummary outputs, objective can also be a function of the summary dict.
+'''
+
+def designSummary(engine):
+    #outputs an optimizer can use as objective or constraint, nan where the engine has no contour
+    thr = engine.max
+    if engine.doContours:
+        engine.heatTransfer # runs the contour and heat stages of lazy engines
+    total_watts = thr.total_watts if engine.doContours else np.nan
+    if engine.doContours:
+        flux = thr.heat_flux_arr[1, :]
+        max_heat_flux = float(np.max(flux))
+        throat_heat_flux = float(flux[np.argmin(engine.area_arr)])
+    else:
+        max_heat_flux = throat_heat_flux = np.nan
+    return {'thrust': thr.thrust, 'isp_s': thr.isp_s, 'total_watts': total_watts, 'max_heat_flux': max_heat_flux,
+        'throat_heat_flux': throat_heat_flux, 'thrust_per_watt': thr.thrust / total_watts if total_watts else np.nan,
+        'exit_d': thr.exit.d, 'throat_d': thr.thr.d, 'exit_p': thr.exit.p, 'cham_t': thr.cham.t}
+
+def latinHypercube(n, d, rng):
+    #n points in the unit cube, one in every 1/n slice of each dimension
+    return (rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T + rng.random((n, d))) / n
+
+class EngineOptimizer:
+    def __init__(self, base, variables, objective = 'isp_s', maximize = True, constraints = None, workers = 1, batchSize = None, seed = None, collect = designSummary):
+        '''
+        base: dict of Engine arguments that stay fixed
+        variables: dict of name -> (low, high) of the Engine arguments to search
+        constraints: dict of output name -> (low, high), None for an open side
+        batchSize: engines per iteration, by default one per worker (at least 4)
+        '''
+        self.base = dict(base)
+        self.names = list(variables)
+        self.bounds = np.array([variables[name] for name in self.names], dtype=float)
+        self.objective = objective
+        self.maximize = maximize
+        self.constraints = dict(constraints or {})
+        self.workers = workers
+        self.batchSize = batchSize if batchSize is not None else max(4, workers or 1)
+        self.rng = np.random.default_rng(seed)
+        self.collect = collect
+        self.radius = 0.2 # trust region size in the unit cube
+        self.minRadius = 1e-3
+        self.u = np.empty((0, len(self.names))) # evaluated points in the unit cube
+        self.summaries = []
+        self.errors = []
+
+    def toDesign(self, u):
+        return self.bounds[:, 0] + u * (self.bounds[:, 1] - self.bounds[:, 0])
+
+    def score(self, summary):
+        #objective to minimize, nan for failed cases
+        if summary is None:
+            return np.nan
+        value = self.objective(summary) if callable(self.objective) else summary[self.objective]
+        value = np.nan if value is None else float(value)
+        return -value if self.maximize else value
+
+    def violation(self, summary):
+        #sum of the constraint violations, each relative to its bound
+        if summary is None:
+            return np.inf
+        total = 0.0
+        for name, (low, high) in self.constraints.items():
+            value = summary[name]
+            if value is None or np.isnan(value):
+                return np.inf
+            if low is not None and value < low:
+                total += (low - value) / max(abs(low), 1e-12)
+            if high is not None and value > high:
+                total += (value - high) / max(abs(high), 1e-12)
+        return total
+
+    def evaluate(self, u):
+        cases = [dict(self.base, **dict(zip(self.names, self.toDesign(x).tolist()))) for x in u]
+        results = runCases(cases, self.workers, collect = self.collect)
+        self.u = np.vstack([self.u, u])
+        for result in results:
+            self.summaries.append(result['result'] if result['ok'] else None)
+            self.errors.append('' if result['ok'] else result['error'])
+
+    def bestIndex(self):
+        #best feasible design, or the least infeasible one when nothing is feasible yet
+        scores = np.array([self.score(s) for s in self.summaries])
+        violations = np.array([self.violation(s) for s in self.summaries])
+        ok = ~np.isnan(scores) & np.isfinite(violations)
+        if not ok.any():
+            return None
+        feasible = ok & (violations == 0)
+        if feasible.any():
+            return int(np.flatnonzero(feasible)[np.argmin(scores[feasible])])
+        candidates = np.flatnonzero(ok)
+        return int(candidates[np.argmin(violations[candidates])])
+
+    def surrogate(self, outputs):
+        #rbf fit of every column of outputs over the evaluated points that ran
+        from scipy.interpolate import RBFInterpolator # only loaded when optimizing
+        good = ~np.isnan(outputs).any(axis=1)
+        scale = np.nanstd(outputs[good], axis=0)
+        scale[~(scale > 0)] = 1.0
+        center = np.nanmean(outputs[good], axis=0)
+        fit = RBFInterpolator(self.u[good], (outputs[good] - center) / scale, kernel='thin_plate_spline', degree=1, smoothing=1e-8)
+        return lambda u: fit(u) * scale + center
+
+    def propose(self, count):
+        best = self.bestIndex()
+        d = len(self.names)
+        if best is None or len(self.u) < d + 2:
+            return latinHypercube(count, d, self.rng)
+        names = list(self.constraints)
+        outputs = np.array([[self.score(s)] + [np.nan if s is None else s[name] for name in names] for s in self.summaries], dtype=float)
+        predict = self.surrogate(outputs)
+        # perturb a random subset of the coordinates of the best point, more of them in fewer dimensions
+        candidates = np.repeat(self.u[best][None, :], 100 * d, axis=0)
+        mask = self.rng.random(candidates.shape) < min(1.0, 20 / d)
+        mask[np.arange(len(mask)), self.rng.integers(0, d, len(mask))] = True
+        candidates = np.clip(candidates + mask * self.rng.normal(0, self.radius, candidates.shape), 0, 1)
+        predicted = predict(candidates)
+        penalty = np.zeros(len(candidates))
+        for j, name in enumerate(names):
+            low, high = self.constraints[name]
+            value = predicted[:, j + 1]
+            if low is not None:
+                penalty += np.maximum(low - value, 0) / max(abs(low), 1e-12)
+            if high is not None:
+                penalty += np.maximum(value - high, 0) / max(abs(high), 1e-12)
+        objective = predicted[:, 0]
+        spread = np.ptp(objective) or 1.0
+        merit = (objective - objective.min()) / spread + 1e3 * penalty
+        chosen = []
+        for i in np.argsort(merit):
+            x = candidates[i]
+            if np.min(np.linalg.norm(self.u - x, axis=1)) < self.minRadius / 2:
+                continue # already evaluated
+            if any(np.linalg.norm(candidates[j] - x) < self.radius / 4 for j in chosen):
+                continue # keep the batch spread out
+            chosen.append(i)
+            if len(chosen) == count:
+                break
+        return candidates[chosen] if chosen else latinHypercube(count, d, self.rng)
+
+    def run(self, budget = 200, initial = None):
+        '''
+        runs engines until budget evaluations were made (or the trust region collapsed) and returns the best design as
+        a dict of the variables, the summary outputs, 'feasible' and 'evaluations'
+        initial is the size of the first latin hypercube sample, 2 * variables + 1 by default
+        '''
+        d = len(self.names)
+        if initial is None:
+            initial = max(2 * d + 1, self.batchSize)
+        if len(self.u) == 0:
+            self.evaluate(latinHypercube(min(initial, budget), d, self.rng))
+        successes = failures = 0
+        while len(self.u) < budget and self.radius >= self.minRadius:
+            before = self.bestIndex()
+            previous = None if before is None else (self.violation(self.summaries[before]), self.score(self.summaries[before]))
+            self.evaluate(self.propose(min(self.batchSize, budget - len(self.u))))
+            after = self.bestIndex()
+            current = None if after is None else (self.violation(self.summaries[after]), self.score(self.summaries[after]))
+            improved = current is not None and (previous is None or current[0] < previous[0] or (current[0] == previous[0] and current[1] < previous[1] - 1e-6 * abs(previous[1])))
+            if improved:
+                successes, failures = successes + 1, 0
+            else:
+                successes, failures = 0, failures + 1
+            if successes >= 3:
+                self.radius, successes = min(2 * self.radius, 0.5), 0
+            elif failures >= max(d, 4):
+                self.radius, failures = self.radius / 2, 0
+            debug(f'optimizer evaluations {len(self.u)} radius {self.radius:.4f} best {current}')
+        return self.best()
+
+    def best(self):
+        i = self.bestIndex()
+        if i is None:
+            return None
+        design = dict(zip(self.names, self.toDesign(self.u[i]).tolist()))
+        design.update(self.summaries[i])
+        design['feasible'] = self.violation(self.summaries[i]) == 0
+        design['evaluations'] = len(self.u)
+        return design
+
+    def results(self):
+        #every evaluated design as SweepResults columns (variables, outputs, violation, error)
+        columns = {name: self.toDesign(self.u)[:, j] if len(self.u) else np.empty(0) for j, name in enumerate(self.names)}
+        outputs = sorted({name for s in self.summaries if s is not None for name in s})
+        for name in outputs:
+            columns[name] = np.array([np.nan if s is None or s.get(name) is None else s[name] for s in self.summaries], dtype=float)
+        columns['violation'] = np.array([self.violation(s) for s in self.summaries], dtype=float)
+        columns['error'] = np.array(self.errors, dtype=str)
+        return SweepResults(columns)
+
+    def __repr__(self):
+        return f'EngineOptimizer({self.names}, objective={self.objective}, evaluations={len(self.u)}, radius={self.radius:.4f})'
@@ -0,0 +1,154 @@
+'''
+coolant property registry
+every coolant is a CoolantTable of rho (kg/m^3), cp (J/kgK), k (W/mK) and mu (Pa s) against temperature (K), and for
+sources that have it pressure (Pa). getCoolant builds the table of a fluid once per process and returns the same table
+after that, the cooling solver and ThrustLevel.fuelWatts both read from it. lookups interpolate linearly and work on
+whole arrays, temperatures and pressures outside the table get its end values.
+sources, in the order they are tried:
+    rocketprops     when asked for with useRocketProps = True and installed, liquid properties up to near the critical point
+    models          the correlations the cooling solver was written with (RP-1 from boysan, ethanol constants)
+    csv             <name>.csv in this folder, either columns T[,p],rho,cp,k,mu or the single row FluidProperties files
+names are matched without case and dashes and with a few aliases, so 'RP-1', 'RP1' and 'rp-1' are the same coolant
+    rp1 = getCoolant('RP-1')
+    cp = rp1.cp(Tc)
+'''
+import os
+import numpy as np
+
+coolantFields = ('rho', 'cp', 'k', 'mu')
+aliases = {'KEROSENE': 'RP1', 'C2H5OH(L)': 'ETHANOL', 'C2H5OH': 'ETHANOL', 'ETOH': 'ETHANOL'}
+folder = os.path.dirname(os.path.abspath(__file__))
+_coolants = {}
+
+def coolantKey(name):
+    key = name.upper().replace('-', '').replace(' ', '')
+    return aliases.get(key, key)
+
+class CoolantTable:
+    def __init__(self, name, T, values, p = None):
+        '''
+        T ascending temperatures, p ascending pressures or None
+        values is a dict of coolantFields -> arrays shaped (len(T),) or (len(p), len(T)), fields a source does not have are nan
+        '''
+        self.name = name
+        self.T = np.asarray(T, dtype=float)
+        self.p = None if p is None else np.asarray(p, dtype=float)
+        self.values = {field: np.asarray(values.get(field, np.full(len(self.T), np.nan)), dtype=float) for field in coolantFields}
+
+    @staticmethod
+    def fromModel(name, model, T):
+        #model(T) returns a dict of coolantFields -> values for an array of temperatures
+        T = np.asarray(T, dtype=float)
+        return CoolantTable(name, T, {field: np.broadcast_to(value, T.shape) for field, value in model(T).items()})
+
+    @staticmethod
+    def fromCSV(name, path):
+        with open(path) as csvfile:
+            header = [column.strip() for column in csvfile.readline().split(',')]
+        data = np.atleast_2d(np.genfromtxt(path, delimiter=',', skip_header=1))
+        columns = {column: data[:, i] for i, column in enumerate(header) if column}
+        if 'T' not in columns: # single row of constants, the FluidProperties files name density roe_l
+            row = {field: columns[source][0] for field, source in (('rho', 'roe_l'), ('cp', 'cp'), ('k', 'k'), ('mu', 'mu')) if source in columns}
+            return CoolantTable(name, [0.0, 1e4], {field: [value, value] for field, value in row.items()})
+        if 'p' not in columns:
+            order = np.argsort(columns['T'])
+            return CoolantTable(name, columns['T'][order], {field: columns[field][order] for field in coolantFields if field in columns})
+        T, p = np.unique(columns['T']), np.unique(columns['p'])
+        if len(columns['T']) != len(T) * len(p):
+            raise ValueError(f'{path} needs a value for every T and p pair')
+        order = np.lexsort((columns['T'], columns['p']))
+        return CoolantTable(name, T, {field: columns[field][order].reshape(len(p), len(T)) for field in coolantFields if field in columns}, p)
+
+    @staticmethod
+    def fromRocketProps(name, pressures = None, points = 200):
+        #liquid properties from the freezing point to 95% of the critical temperature, pressures (Pa) add compressed density
+        from rocketprops.rocket_prop import get_prop # only loaded when asked for
+        prop = get_prop(name)
+        if prop is None:
+            raise ValueError(f'rocketprops has no fluid named {name}')
+        TdegR = np.linspace(prop.Tfreeze, 0.95 * prop.Tc, points)
+        values = {'cp': [prop.CpAtTdegR(t) * 4186.8 for t in TdegR], # BTU/lbm-R
+            'k': [prop.CondAtTdegR(t) * 1.730735 for t in TdegR], # BTU/hr-ft-R
+            'mu': [prop.ViscAtTdegR(t) * 0.1 for t in TdegR]} # poise
+        if pressures is None:
+            values['rho'] = [prop.SGLiqAtTdegR(t) * 1000 for t in TdegR]
+            return CoolantTable(name, TdegR / 1.8, values)
+        pressures = np.sort(np.asarray(pressures, dtype=float))
+        values = {field: np.tile(value, (len(pressures), 1)) for field, value in values.items()}
+        values['rho'] = [[prop.SG_compressed(t, p / 6894.757) * 1000 for t in TdegR] for p in pressures]
+        return CoolantTable(name, TdegR / 1.8, values, pressures)
+
+    def evaluate(self, field, T, p = None):
+        #field at the temperatures T (and pressures p, the lowest table pressure when None), T and p broadcast together
+        values = self.values[field]
+        if values.ndim == 1:
+            return np.interp(T, self.T, values)
+        if len(self.p) == 1 or p is None:
+            return np.interp(T, self.T, values[0])
+        T, p = np.broadcast_arrays(np.asarray(T, dtype=float), np.clip(np.asarray(p, dtype=float), self.p[0], self.p[-1]))
+        rows = np.array([np.interp(T.ravel(), self.T, row) for row in values])
+        j = np.clip(np.searchsorted(self.p, p.ravel()) - 1, 0, len(self.p) - 2)
+        w = (p.ravel() - self.p[j]) / (self.p[j + 1] - self.p[j])
+        n = np.arange(T.size)
+        return ((1 - w) * rows[j, n] + w * rows[j + 1, n]).reshape(T.shape)
+
+    def rho(self, T, p = None):
+        return self.evaluate('rho', T, p)
+
+    def cp(self, T, p = None):
+        return self.evaluate('cp', T, p)
+
+    def k(self, T, p = None):
+        return self.evaluate('k', T, p)
+
+    def mu(self, T, p = None):
+        return self.evaluate('mu', T, p)
+
+    def enthalpyRise(self, T, deltaT, p = None):
+        #J/kg to heat the coolant from T to T + deltaT, the exact integral of the interpolated cp
+        grid = np.concatenate(([T], self.T[(self.T > T) & (self.T < T + deltaT)], [T + deltaT]))
+        cp = self.cp(grid, p)
+        return float(np.sum(np.diff(grid) * (cp[1:] + cp[:-1]) / 2))
+
+    def __repr__(self):
+        pressures = '' if self.p is None else f', p={len(self.p)}'
+        return f'CoolantTable({self.name}, T={self.T[0]:.1f}..{self.T[-1]:.1f} K{pressures})'
+
+def rp1Model(T):
+    #BOYSAN's RP-1 correlations, valid from 300 to 800 K
+    T = np.clip(T, 300, 800)
+    return {'rho': 820.0, 'cp': -2.82649e-3*T**2.0 + 6.77751e0*T - 2.45234e1, 'k': 9.64e-8*T**2 - 2.95e-4*T + 0.261,
+        'mu': -1.46e-11*T**3 + 3.22e-8*T**2 - 2.39e-5*T + 6e-3}
+
+def ethanolModel(T):
+    return {'rho': 785.3, 'cp': 2570.0, 'k': 0.167, 'mu': 1.36e-3}
+
+models = {'RP1': (rp1Model, np.linspace(300, 800, 5001)), 'ETHANOL': (ethanolModel, np.array([0.0, 1e4]))}
+
+def registerCoolant(name, table):
+    #adds or replaces a coolant for the rest of the process
+    _coolants[(coolantKey(name), False)] = table
+
+def getCoolant(name, useRocketProps = False):
+    key = (coolantKey(name), bool(useRocketProps))
+    if key in _coolants:
+        return _coolants[key]
+    table = None
+    if useRocketProps:
+        try:
+            table = CoolantTable.fromRocketProps(name)
+        except ImportError:
+            print(f'rocketprops is not installed, using the built in properties of {name}')
+    if table is None and key[0] in models:
+        model, T = models[key[0]]
+        table = CoolantTable.fromModel(name, model, T)
+    if table is None:
+        path = os.path.join(folder, f'{name}.csv')
+        if not os.path.isfile(path):
+            raise ValueError(f'no coolant properties for {name}')
+        table = CoolantTable.fromCSV(name, path)
+    _coolants[key] = table
+    return table
+
+def clearCoolants():
+    _coolants.clear()
@@ -4,9 +4,13 @@ h_fg        enthalpy of vaporization
 T_sat       saturation temperature
 roe_l       density in liquid phase
 c_l         specific heat capacity liquid phase
+cp          specific heat capacity, the coolant registry's at T_inlet when the registry has one for the fluid
+coolant     CoolantTable of the fluid from the coolant registry (coolantProperties), None when it has none
+T_inlet     temperature the fluid enters the cooling jacket at
 '''
 import os
-from rocketprops.rocket_prop import get_prop
+import math
+from .coolantProperties import getCoolant, folder
 
 class FluidProperties:
     h_fg = None
@@ -14,32 +18,37 @@ class FluidProperties:
     roe_l = None
     c_l = None
     cp = None
+    T_inlet = 298.15
     def __init__(self, fluidName, useRocketPropsLib = False):
-        if useRocketPropsLib:
-            try:
-                prop = get_prop(fluidName)#'rp-1'
-            except:
-                print(f'could not import fluid property in rocketprops named {fluidName}')
-            h_fg = None
-            T_sat = None
-            roe_l = None
-            c_l = None
-            cp = None
+        self.name = fluidName
+        try:
+            self.coolant = getCoolant(fluidName, useRocketPropsLib)
+        except ValueError:
+            self.coolant = None
+        if useRocketPropsLib and self.coolant is not None:
+            roe_l, c_l = float(self.coolant.rho(self.T_inlet)), float(self.coolant.cp(self.T_inlet))
+            self.roe_l = roe_l if math.isfinite(roe_l) else None
+            self.c_l = c_l if math.isfinite(c_l) else None
         else:
             #print(os.getcwd())
-            self.name = fluidName
             try:
-                with open(f'src_cea/fluidProperties/{fluidName}.csv') as csvfile:
+                with open(os.path.join(folder, f'{fluidName}.csv')) as csvfile:
                     lines = csvfile.readlines()
                     #print(lines)
                     for i in range(len(lines)):
                         lines[i] = lines[i].split(',')
                     #print(f'len(lines[0]) = {len(lines[0])}')
                     #print(lines)
-                    for i in range(len(lines[0])):
-                        self.__setattr__(lines[0][i], float(lines[1][i]))
+                    for name, value in zip(lines[0], lines[1]):
+                        if name.strip(): # the header ends with a comma
+                            self.__setattr__(name.strip(), float(value))
             except:
                 print(f'could not import fluid property file {fluidName}.csv')
+        # one cp for the fluid, the same one fuelWatts integrates, tables without a cp column keep the constant
+        if self.coolant is not None:
+            cp = float(self.coolant.cp(self.T_inlet))
+            if math.isfinite(cp):
+                self.cp = cp
 
     def __repr__(self):
         return f"h_fg: {self.h_fg} " \
@@ -0,0 +1,45 @@
+import numpy as np
+'''
+wall heat load integration over a sampled contour
+the wall between two stations is treated as a cone frustum strip, its wetted area taken as 2*pi*r*ds at the first station
+(the same rule totalWatts has always used), so the heat through it is that area times the heat flux at the first station.
+everything that only depends on the contour is worked out once, so every thrust level on the same contour reuses it
+'''
+
+regionNames = ('chamber', 'converging', 'throat', 'nozzle')
+
+class HeatLoadIntegrator:
+    def __init__(self, contour, joints = None):
+        '''
+        contour is the 2xN [x, radius] array
+        joints are the x positions of the contour points a, b, c, d, o, n, e (ContourGeometry.joints), needed for the region subtotals:
+            chamber a-b, converging b-d, throat d-n, nozzle n-e
+        '''
+        self.x = contour[0,:].copy()
+        self.ds = np.hypot(np.diff(contour[0,:]), np.diff(contour[1,:])) # arc length of every segment
+        self.wetted_area = 2 * np.pi * contour[1,:-1] * self.ds # wetted area of every segment
+        self.arc_length = np.concatenate(([0.0], np.cumsum(self.ds)))
+        self.regions = {}
+        if joints is not None:
+            a, b, c, d, o, n, e = np.searchsorted(self.x, joints)
+            self.regions = dict(zip(regionNames, ((a, b), (b, d), (d, n), (n, e))))
+
+    def segmentWatts(self, heat_flux):
+        return self.wetted_area * np.asarray(heat_flux)[...,:-1]
+
+    def cumulativeWatts(self, heat_flux):
+        #heat picked up from the first station to every station, first value is 0
+        watts = self.segmentWatts(heat_flux)
+        return np.concatenate((np.zeros(watts.shape[:-1] + (1,)), np.cumsum(watts, axis=-1)), axis=-1)
+
+    def integrate(self, heat_flux):
+        '''
+        heat_flux is the heat flux at every station (W/m^2)
+        returns total watts, the 2xN [x, cumulative watts] heat load array and a dict of watts per region
+        '''
+        cumulative = self.cumulativeWatts(heat_flux)
+        return cumulative[...,-1], np.array([self.x, cumulative]), self.regionWatts(cumulative)
+
+    def regionWatts(self, cumulative):
+        #watts per region from cumulativeWatts, works on stacked (throttle x station) arrays as well
+        return {name: cumulative[...,end] - cumulative[...,start] for name, (start, end) in self.regions.items()}
@@ -0,0 +1,113 @@
+import numpy as np
+from .machSolver import areaRatioFromMach, solveMachArray
+from .runCEA import RunCEA
+'''
+frozen ideal gas thermochemistry with the same create() as RunCEA
+a single gamma, molecular weight and chamber temperature describe the gas everywhere, which is good enough for early
+trade studies and runs without the rocketcea fortran build. the gas can be given directly or calibrated from a few
+CEA anchor runs (fromCEA) in which case every property is interpolated linearly in mixture ratio.
+stations() works on whole arrays of Pc, MR and eps/PcOvPe at once, create() wraps it for ThrustLevel and Engine:
+    Engine(..., backend = IdealGasBackend(gam = 1.2, MW = 22, Tc = 3300))
+units follow RunCEA: p in bar, t in K, cp in kJ/kgK, h in kJ/kg (relative to the chamber), mu in millipoise
+'''
+
+R_universal = 8314.46261815324 # J/kmolK
+
+def bartzViscosity(MW, t):
+    #bartz's estimate mu = 46.6e-10 * MW^0.5 * T(R)^0.6 lb/in-s, converted to millipoise
+    return 46.6e-10 * MW**0.5 * (1.8 * t)**0.6 * 17.858 / 1e-4
+
+class IdealGasBackend:
+    needsCEA = False # Engine does not build a CEA_Obj for this backend
+
+    def __init__(self, gam = 1.2, MW = 22.0, Tc = 3300.0, mu = None, pr = None, Mr = None):
+        '''
+        gam, MW (kg/kmol) and Tc (K) describe the gas, mu (millipoise, chamber) and pr default to bartz's viscosity
+        estimate and the eucken prandtl number 4*gam/(9*gam-5)
+        with Mr (ascending mixture ratios) every other argument can be an array of the values at those mixture ratios
+        '''
+        self.Mr = None if Mr is None else np.asarray(Mr, dtype=float)
+        self.gam = gam
+        self.MW = MW
+        self.Tc = Tc
+        self.mu = mu
+        self.pr = pr
+
+    @staticmethod
+    def fromCEA(cea, Pc, Mr, frozen = 1, eps = 10.0):
+        #calibrates the gas from one CEA run per mixture ratio in Mr at chamber pressure Pc
+        Mr = np.sort(np.atleast_1d(np.asarray(Mr, dtype=float)))
+        gam, MW, Tc, mu, pr = [], [], [], [], []
+        for mr in Mr:
+            chems = RunCEA.create(cea, Pc, mr, ae = eps, frozen = frozen)
+            cham, thr = chems[-3], chems[-2]
+            gam.append(cham.gam if frozen else thr.gam)
+            MW.append(cham.m)
+            Tc.append(cham.t)
+            mu.append(cham.mu)
+            pr.append(thr.pr)
+        return IdealGasBackend(np.array(gam), np.array(MW), np.array(Tc), np.array(mu), np.array(pr), Mr)
+
+    def gas(self, Mr):
+        #gam, MW, Tc, mu, pr at the mixture ratios Mr
+        values = []
+        for value in (self.gam, self.MW, self.Tc, self.mu, self.pr):
+            if value is None or self.Mr is None or np.ndim(value) == 0:
+                values.append(None if value is None else np.broadcast_to(np.asarray(value, dtype=float), np.shape(Mr)))
+            else:
+                values.append(np.interp(Mr, self.Mr, value))
+        return values
+
+    def station(self, mach, aeat, Pc, gam, MW, Tc, mu, pr, Cstar):
+        k = (gam - 1) / 2
+        D = 1 + k * mach**2
+        t = Tc / D
+        p = Pc * D**(-gam / (gam - 1))
+        R = R_universal / MW
+        son = np.sqrt(gam * R * t)
+        cp = gam / (gam - 1) * R / 1000
+        return {'t': t, 'p': p, 'gam': gam, 'cp': cp, 'son': son, 'mach': mach, 'aeat': aeat, 'Cstar': Cstar,
+            'ivac': mach * son + p / Pc * aeat * Cstar, 'rho': p * 1e5 / (R * t), 'h': cp * (t - Tc), 'm': MW,
+            'mu': bartzViscosity(MW, t) if mu is None else mu * (t / Tc)**0.6, 'pr': 4 * gam / (9 * gam - 5) if pr is None else pr}
+
+    def stations(self, Pc, Mr, ae = None, PcOvPe = None, fac_CR = None):
+        '''
+        vectorized over Pc, Mr and ae or PcOvPe (arrays that broadcast together)
+        returns a list of dicts of arrays in RunCEA order: [injector,] chamber, throat, exit
+        '''
+        if (ae is None) == (PcOvPe is None):
+            raise ValueError('IdealGasBackend needs exactly one of ae or PcOvPe')
+        third = ae if ae is not None else PcOvPe
+        Pc, Mr, third = np.broadcast_arrays(np.asarray(Pc, dtype=float), np.asarray(Mr, dtype=float), np.asarray(third, dtype=float))
+        gam, MW, Tc, mu, pr = self.gas(Mr)
+        Cstar = np.sqrt(R_universal / MW * Tc / gam) / (2 / (gam + 1))**((gam + 1) / (2 * (gam - 1)))
+        if ae is not None:
+            machExit, iterations, converged = solveMachArray(third, gam, supersonic = np.ones(third.shape, dtype=bool))
+        else:
+            machExit = np.sqrt(2 / (gam - 1) * (third**((gam - 1) / gam) - 1))
+        zeros, ones = np.zeros(Pc.shape), np.ones(Pc.shape)
+        stations = []
+        if fac_CR is not None: # finite area combustor, the injector is at rest and the chamber ends at contraction ratio fac_CR
+            stations.append(self.station(zeros, zeros, Pc, gam, MW, Tc, mu, pr, Cstar))
+            machCham, iterations, converged = solveMachArray(np.full(Pc.shape, float(fac_CR)), gam, supersonic = np.zeros(Pc.shape, dtype=bool))
+            stations.append(self.station(machCham, np.full(Pc.shape, float(fac_CR)), Pc, gam, MW, Tc, mu, pr, Cstar))
+        else:
+            stations.append(self.station(zeros, zeros, Pc, gam, MW, Tc, mu, pr, Cstar))
+        stations.append(self.station(ones, ones, Pc, gam, MW, Tc, mu, pr, Cstar))
+        stations.append(self.station(machExit, areaRatioFromMach(machExit, gam), Pc, gam, MW, Tc, mu, pr, Cstar))
+        return stations
+
+    def create(self, cea, Pc, Mr, ae = None, pAmbient = None, frozen = 0, frozenAtThroat = 0):
+        #same call and returns as RunCEA.create, cea is only checked for fac_CR and can be None
+        PcOvPe = None if pAmbient is None else Pc / pAmbient
+        chems = []
+        for station in self.stations(Pc, Mr, ae, None if ae is not None else PcOvPe, getattr(cea, 'fac_CR', None)):
+            rrr = RunCEA()
+            for name, value in station.items():
+                setattr(rrr, name, float(value))
+            rrr.rbar = rrr.initCalculations()
+            chems.append(rrr)
+        return chems
+
+    def __repr__(self):
+        return f'IdealGasBackend(gam={self.gam}, MW={self.MW}, Tc={self.Tc}, Mr={self.Mr})'
@@ -0,0 +1,81 @@
+import json
+import time
+import platform
+from contextlib import contextmanager
+'''
+stage timing for Engine, ThrustLevel and the sweeps built on them
+code marks its stages with "with span('name'):", spans opened inside other spans are recorded under their parents'
+path (engine/thrustLevel/cea). wall and cpu time are summed per path over every engine run while recording is enabled.
+everything is silent by default and a disabled span costs one flag check.
+    enable()           start recording, enable(printSpans=True) also prints every finished span and the debug() messages
+    summary()          text table of the recorded stages
+    report()/writeReport(path)   the same numbers as a dict / json file
+    reset()            drop everything recorded
+'''
+
+enabled = False
+verbose = False
+_stack = [] # names of the spans currently open
+_stages = {} # path -> [calls, wall seconds, cpu seconds]
+
+def enable(printSpans = False):
+    global enabled, verbose
+    enabled = True
+    verbose = printSpans
+
+def disable():
+    global enabled, verbose
+    enabled = False
+    verbose = False
+
+def reset():
+    _stack.clear()
+    _stages.clear()
+
+@contextmanager
+def span(name):
+    if not enabled:
+        yield
+        return
+    _stack.append(name)
+    path = '/'.join(_stack)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        _stack.pop()
+        stage = _stages.setdefault(path, [0, 0.0, 0.0])
+        stage[0] += 1
+        stage[1] += wall
+        stage[2] += cpu
+        if verbose:
+            print(f'{path} run time: {wall:.6f}s')
+
+def debug(message):
+    #debug dumps that used to be printed unconditionally
+    if verbose:
+        print(message)
+
+def record(path, wall, cpu = 0.0, calls = 1):
+    #adds time measured somewhere else (e.g. in a worker process) to the registry
+    stage = _stages.setdefault(path, [0, 0.0, 0.0])
+    stage[0] += calls
+    stage[1] += wall
+    stage[2] += cpu
+
+def report():
+    stages = {path: {'calls': calls, 'wall': wall, 'cpu': cpu, 'wallPerCall': wall / calls if calls else 0.0}
+        for path, (calls, wall, cpu) in sorted(_stages.items())}
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'stages': stages}
+
+def writeReport(path):
+    with open(path, 'w') as f:
+        json.dump(report(), f, indent=2)
+
+def summary():
+    lines = [f"{'stage':<48}{'calls':>8}{'wall (s)':>12}{'cpu (s)':>12}{'wall/call (ms)':>16}"]
+    for path, (calls, wall, cpu) in sorted(_stages.items()):
+        name = '  ' * path.count('/') + path.rsplit('/', 1)[-1]
+        lines.append(f'{name:<48}{calls:>8}{wall:>12.4f}{cpu:>12.4f}{1000 * wall / calls:>16.3f}')
+    return '\n'.join(lines)
@@ -0,0 +1,89 @@
+import numpy as np
+'''
+batched isentropic area-mach solver
+solves ( 2/(gam+1) * (1 + (gam-1)/2 * M^2) )^((gam+1)/(2*(gam-1))) / M = A/A* for every station at once
+the equation is solved in log form, F(M) = ln(A/A*(M)) - ln(area_ratio), with a vectorized halley iteration
+https://web.mit.edu/16.unified/www/SPRING/propulsion/notes/node104.html
+'''
+
+def areaRatioFromMach(mach, gam):
+    #A/A* for a given mach number, works on arrays
+    mach = np.asarray(mach, dtype=float)
+    return (2 / (gam + 1) * (1 + (gam - 1) / 2 * mach**2))**((gam + 1) / (2 * (gam - 1))) / mach
+
+def machGuess(area_ratio, gam, supersonic):
+    #explicit starting guesses for both branches, good enough that halley converges in a few steps
+    lnAr = np.log(np.maximum(area_ratio, 1.0))
+    p = (gam + 1) / (2 * (gam - 1))
+    # near the throat ln(A/A*) ~ 2/(gam+1) * (M-1)^2
+    nearThroat = np.sqrt((gam + 1) / 2 * lnAr)
+    # far from the throat A/A* ~ (2/(gam+1))^p / M subsonic and ((gam-1)/(gam+1))^p * M^(2/(gam-1)) supersonic
+    subFar = (2 / (gam + 1))**p / np.maximum(area_ratio, 1.0)
+    supFar = (np.maximum(area_ratio, 1.0) / ((gam - 1) / (gam + 1))**p)**((gam - 1) / 2)
+    # keep whichever estimate is closer to the target area ratio
+    sub = np.clip(np.stack((1 - nearThroat, subFar)), 1e-8, 1 - 1e-8)
+    sup = np.maximum(np.stack((1 + nearThroat, supFar)), 1 + 1e-8)
+    guesses = np.where(supersonic, sup, sub)
+    err = np.abs(np.log(areaRatioFromMach(guesses, gam)) - lnAr)
+    return np.where(err[0] <= err[1], guesses[0], guesses[1])
+
+def solveMachArray(area_ratio, gam, throatIndex = None, supersonic = None, mach_guess = None, tol = 1e-12, maxIter = 50):
+    '''
+    area_ratio  station area / throat area, any shape, the last axis runs along the contour
+    gam         ratio of specific heats, scalar or broadcastable against area_ratio
+    throatIndex index of the throat along the last axis, stations after it are solved on the supersonic branch
+                defaults to the station with the smallest area ratio
+    supersonic  optional boolean array that overrides throatIndex for choosing the branch
+    mach_guess  optional starting values (from a table lookup or a previous solution)
+    returns mach, iterations, converged  (iterations and converged are per station)
+    '''
+    area_ratio = np.asarray(area_ratio, dtype=float)
+    gam = np.broadcast_to(np.asarray(gam, dtype=float), area_ratio.shape)
+    if supersonic is None:
+        if throatIndex is None:
+            throatIndex = np.argmin(area_ratio, axis=-1)
+        throatIndex = np.expand_dims(np.asarray(throatIndex), -1)
+        supersonic = np.arange(area_ratio.shape[-1]) > throatIndex
+    supersonic = np.broadcast_to(supersonic, area_ratio.shape)
+
+    # anything at or below the throat area ratio is sonic, CEA/contour round off can give values slightly under 1
+    sonic = area_ratio <= 1 + 1e-14
+    lnAr = np.log(np.maximum(area_ratio, 1.0))
+    if mach_guess is None:
+        mach = machGuess(area_ratio, gam, supersonic)
+    else:
+        mach = np.array(np.broadcast_to(mach_guess, area_ratio.shape), dtype=float)
+        mach = np.where(supersonic, np.maximum(mach, 1 + 1e-8), np.clip(mach, 1e-8, 1 - 1e-8))
+    mach = np.where(sonic, 1.0, mach)
+
+    iterations = np.zeros(area_ratio.shape, dtype=np.int32)
+    active = ~sonic
+    k = (gam - 1) / 2
+    for _ in range(maxIter):
+        if not active.any():
+            break
+        m = mach[active]
+        g = gam[active]
+        kk = k[active]
+        D = 1 + kk * m**2
+        F = np.log(areaRatioFromMach(m, g)) - lnAr[active]
+        dF = (m**2 - 1) / (m * D)
+        d2F = 1 / m**2 + (g + 1) / 2 * (1 - kk * m**2) / D**2
+        step = F / dF
+        step = step / (1 - 0.5 * step * d2F / dF) #halley correction
+        new = m - step
+        # keep every station on its own branch, fall back to bisecting toward the sonic point
+        sup = supersonic[active]
+        bad = np.where(sup, new <= 1, (new <= 0) | (new >= 1)) | ~np.isfinite(new)
+        new = np.where(bad & sup, (m + 1) / 2, new)
+        new = np.where(bad & ~sup, np.where(new <= 0, m / 2, (m + 1) / 2), new)
+        mach[active] = new
+        iterations[active] += 1
+        # the residual test catches stations right next to the throat where round off limits the step size
+        # (the power in A/A* amplifies round off by about (gam+1)/(gam-1))
+        done = (np.abs(new - m) <= tol * np.maximum(new, 1.0)) | (np.abs(F) <= 4 * np.finfo(float).eps * (g + 1) / (g - 1))
+        idx = np.flatnonzero(active)
+        active.flat[idx[done]] = False
+
+    converged = ~active
+    return mach, iterations, converged
@@ -0,0 +1,113 @@
+import os
+import tempfile
+from collections import OrderedDict
+import numpy as np
+from .machSolver import solveMachArray
+'''
+inverse area ratio -> mach interpolation tables
+one table is built per gamma and holds both branches as mach vs s = sqrt(ln(A/A*)).
+in s the two branches leave the throat linearly, so plain linear interpolation is monotone and accurate right up to M = 1.
+a lookup gives a starting value that solveMachArray finishes off in one or two halley steps
+'''
+
+maxTables = 32 #number of tables kept in memory, least recently used tables are dropped first
+_tables = OrderedDict()
+
+class MachTable:
+    def __init__(self, gam, accuracy = 1e-4, machMin = 1e-3, machMax = 12.0, sub = None, sup = None):
+        self.gam = gam
+        self.accuracy = accuracy
+        self.machMin = machMin
+        self.machMax = machMax
+        if sub is None or sup is None:
+            sub = self.buildBranch(machMin, False)
+            sup = self.buildBranch(machMax, True)
+        self.sub = sub # 2xN [s, mach], s ascending, mach falling from 1
+        self.sup = sup # 2xN [s, mach], s ascending, mach rising from 1
+
+    def exactMach(self, s, supersonic):
+        mach, iterations, converged = solveMachArray(np.exp(s**2), self.gam, supersonic = np.full(s.shape, supersonic))
+        return mach
+
+    def buildBranch(self, machEnd, supersonic):
+        #keeps doubling the number of points until the midpoints of every interval interpolate within accuracy
+        sEnd = np.sqrt(np.log((2 / (self.gam + 1) * (1 + (self.gam - 1) / 2 * machEnd**2))**((self.gam + 1) / (2 * (self.gam - 1))) / machEnd))
+        num = 65
+        while True:
+            s = np.linspace(0, sEnd, num)
+            mach = self.exactMach(s, supersonic)
+            mach[0] = 1.0
+            sMid = (s[1:] + s[:-1]) / 2
+            err = np.max(np.abs(np.interp(sMid, s, mach) - self.exactMach(sMid, supersonic)))
+            if err <= self.accuracy or num > 2**20:
+                return np.array([s, mach])
+            num = 2 * num - 1
+
+    def lookup(self, area_ratio, supersonic):
+        s = np.sqrt(np.log(np.maximum(area_ratio, 1.0)))
+        return np.where(supersonic, np.interp(s, self.sup[0], self.sup[1]), np.interp(s, self.sub[0], self.sub[1]))
+
+    def solve(self, area_ratio, throatIndex = None, supersonic = None, refineIter = 5):
+        #table lookup followed by a few halley refinement steps, same returns as solveMachArray
+        area_ratio = np.asarray(area_ratio, dtype=float)
+        if supersonic is None:
+            if throatIndex is None:
+                throatIndex = np.argmin(area_ratio, axis=-1)
+            supersonic = np.arange(area_ratio.shape[-1]) > np.expand_dims(np.asarray(throatIndex), -1)
+        supersonic = np.broadcast_to(supersonic, area_ratio.shape)
+        guess = self.lookup(area_ratio, supersonic)
+        return solveMachArray(area_ratio, self.gam, supersonic = supersonic, mach_guess = guess, maxIter = refineIter)
+
+    def save(self, path):
+        #written to a temp file first so other processes never see a half written table
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, gam=self.gam, accuracy=self.accuracy, machMin=self.machMin, machMax=self.machMax, sub=self.sub, sup=self.sup)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            return MachTable(float(data['gam']), float(data['accuracy']), float(data['machMin']), float(data['machMax']), sub = data['sub'], sup = data['sup'])
+
+    def __repr__(self):
+        return f'MachTable(gam={self.gam}, accuracy={self.accuracy}, points={self.sub.shape[1]}+{self.sup.shape[1]})'
+
+def tableFileName(gam, accuracy):
+    return f'machTable_gam{gam:.10f}_acc{accuracy:g}.npz'
+
+def getMachTable(gam, accuracy = 1e-4, cacheDir = None):
+    '''
+    returns the table for gam, building it only if it is not in memory or in cacheDir
+    cacheDir is optional, when given tables are loaded from and saved to that folder
+    '''
+    gam = round(float(gam), 10)
+    key = (gam, accuracy)
+    if key in _tables:
+        _tables.move_to_end(key)
+        return _tables[key]
+    table = None
+    if cacheDir is not None:
+        path = os.path.join(cacheDir, tableFileName(gam, accuracy))
+        if os.path.isfile(path):
+            try:
+                table = MachTable.load(path)
+            except (OSError, KeyError, ValueError):
+                table = None
+    if table is None:
+        table = MachTable(gam, accuracy)
+        if cacheDir is not None:
+            os.makedirs(cacheDir, exist_ok=True)
+            table.save(os.path.join(cacheDir, tableFileName(gam, accuracy)))
+    _tables[key] = table
+    while len(_tables) > maxTables:
+        _tables.popitem(last=False)
+    return table
+
+def clearMachTables():
+    _tables.clear()
+
+def solveMachTable(area_ratio, gam, throatIndex = None, supersonic = None, accuracy = 1e-4, cacheDir = None):
+    #drop in replacement for solveMachArray when the same gamma is solved over and over
+    return getMachTable(gam, accuracy, cacheDir).solve(area_ratio, throatIndex, supersonic)
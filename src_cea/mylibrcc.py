@@ -40,10 +40,11 @@ sigmae =
 import csv
 import numpy as np
 import math
-import pyCEA
 from scipy import optimize
 import os
 import subprocess
+from .machSolver import solveMachArray
+from .fluidProperties.coolantProperties import getCoolant
 
 def geometry(data_in, data_out):
     with open(data_in['geometry_path']) as csv_file:
@@ -106,233 +107,199 @@ def geometry(data_in, data_out):
                 aux = (2*np.pi*r2)/N - data_in['CCW']
                 data_out['FT'].append(aux)
 
-        data_out['L'] = []
-        for i in range(0, data_out['size']):
-            if(i==0):
-                A = 0.5*(data_out['z'][i+1]+data_out['z'][i]) - data_out['z'][i]
-                B = 0.5*(data_out['r1'][i+1]+data_out['r1'][i]) - data_out['r1'][i]
-                data_out['L'].append(math.sqrt(A**2 + B**2))
-            else:
-                if(i!=(data_out['size']-1)):
-                    A = 0.5*(data_out['z'][i+1]+data_out['z'][i]) - 0.5*(data_out['z'][i]+data_out['z'][i-1])
-                    B = 0.5*(data_out['r1'][i+1]+data_out['r1'][i]) - 0.5*(data_out['r1'][i]+data_out['r1'][i-1])
-                    data_out['L'].append(math.sqrt(A**2 + B**2))
-                else:
-                    A = data_out['z'][i] - 0.5*(data_out['z'][i]+data_out['z'][i-1])
-                    B = data_out['r1'][i] - 0.5*(data_out['r1'][i]+data_out['r1'][i-1])
-                    data_out['L'].append(math.sqrt(A**2 + B**2))
+        for name in ('r1', 'r2', 'r3', 'Ae', 'Ae/At', 'z', 'N', 'CCH', 'CCW', 'FT'):
+            data_out[name] = np.array(data_out[name], dtype=float)
+
+        # wall length of every station, from the midpoint with the station before to the midpoint with the one after
+        z_edges = np.concatenate(([data_out['z'][0]], 0.5*(data_out['z'][1:]+data_out['z'][:-1]), [data_out['z'][-1]]))
+        r_edges = np.concatenate(([data_out['r1'][0]], 0.5*(data_out['r1'][1:]+data_out['r1'][:-1]), [data_out['r1'][-1]]))
+        data_out['L'] = np.hypot(np.diff(z_edges), np.diff(r_edges))
     data_out['error_code'] = 0
 
+coolantFieldNames = {'ro': 'rho', 'cp': 'cp', 'k': 'k', 'mi': 'mu'}
+
 def coolant_prop(coolant_name, prop_name, temperature):
-    if coolant_name == 'RP-1':
-        if temperature > 800:
-            temperature = 800
-        if temperature < 300:
-            temperature = 300
-
-        if prop_name == 'ro':
-            return 820
-        if prop_name == 'cp':
-            return -2.82649e-3*temperature**2.0 + 6.77751e0*temperature - 2.45234e1 #BOYSAN
-        if prop_name == 'k':
-            return 9.64e-8*temperature**2-2.95e-4*temperature+0.261 #BOYSAN
-        if prop_name == 'mi':
-            return -1.46e-11*temperature**3+3.22e-8*temperature**2-2.39e-5*temperature+6E-3 #BOYSAN
-    if coolant_name == 'C2H5OH(L)':
-        if prop_name == 'ro':
-            return 785.3
-        if prop_name == 'cp':
-            return 2570
-        if prop_name == 'k':
-            return 0.167
-        if prop_name == 'mi':
-            return 1.36e-3
-    else:
-        print('Coolant proprieties not found')
-        return -1
+    #temperature can be a number or an array of station temperatures, the properties come from the coolant registry
+    return getCoolant(coolant_name).evaluate(coolantFieldNames[prop_name], temperature)
+
+def swamee_jain_friction(Re, relative_roughness):
+    #explicit darcy friction factor f = 0.25/log10(e/D/3.7 + 5.74/Re^0.9)^2, within a few percent of colebrook
+    return 0.25/np.log10(np.asarray(relative_roughness, dtype=float)/3.7 + 5.74/np.asarray(Re, dtype=float)**0.9)**2
+
+def colebrook_friction(Re, relative_roughness, tol=1e-14, max_iterations=20):
+    '''
+    darcy friction factor from the colebrook equation 1/sqrt(f) = -2*log10(e/D/3.7 + 2.51/(Re*sqrt(f))) for arrays of
+    Re and e/D, newton's method on x = 1/sqrt(f) started from the explicit swamee-jain estimate
+    '''
+    Re = np.asarray(Re, dtype=float)
+    a = np.asarray(relative_roughness, dtype=float)/3.7
+    b = 2.51/Re
+    x = 1/np.sqrt(swamee_jain_friction(Re, relative_roughness))
+    for i in range(max_iterations):
+        arg = a + b*x
+        F = x + 2*np.log10(arg)
+        dF = 1 + 2*b/(arg*math.log(10))
+        new = np.maximum(x - F/dF, 0.5*x) # F is concave so after the first step x rises to the root, the clamp keeps it positive
+        done = np.all(np.abs(new - x) <= tol*new)
+        x = new
+        if done:
+            break
+    return 1/x**2
+
+class CoolingState:
+    '''
+    per station state of the cooling solver, one contiguous float64 row per field in a single (fields, size) block
+    fields read and write as attributes (state.Tc) or items (state['Tc']), both are views into state.data
+    '''
+    fields = ('Tc', 'Twg', 'Twc', 'Taw', 'cp_c', 'k_c', 'mi_c', 'Pr_c', 'gama', 'M', 'cp', 'R', 'h_g', 'Re_c', 'D_h', 'mi_s', 'h_c',
+        'Aa', 'Atotal', 'm', 'eta_f', 'eta_o', 'R_c', 'R_g', 'R_w', 'q', 'Q', 'f', 'ro', 'V_c', 'hl', 'deltap', 'T_static', 'p_static')
+    index = {name: i for i, name in enumerate(fields)}
+    __slots__ = ('data',)
+
+    def __init__(self, size):
+        self.data = np.full((len(self.fields), size), np.nan)
+
+    def __getattr__(self, name):
+        try:
+            return self.data[CoolingState.index[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        if name in CoolingState.index:
+            self.data[CoolingState.index[name]] = value
+        else:
+            object.__setattr__(self, name, value)
+
+    __getitem__ = __getattr__
+    __setitem__ = __setattr__
+
+    def __contains__(self, name):
+        return name in CoolingState.index
+
+    @property
+    def size(self):
+        return self.data.shape[1]
+
+    def __repr__(self):
+        return f'CoolingState(size={self.size}, {self.data.nbytes / 1e3:.1f} kB)'
 
 def create_prop(data_in, data_out):
-    data_out['Tc'] = data_out['size']*[data_in['Tc_primary']]
-    data_out['Twg'] = data_out['size']*[data_in['Twg_primary']]
-    data_out['Twc'] = data_out['size']*[data_in['Twc_primary']]
-    data_out['Taw'] = data_out['size']*[data_in['Taw_primary']]
-
-    data_out['cp_c'] = data_out['size']*[None]
-    data_out['k_c'] = data_out['size']*[None]
-    data_out['mi_c'] = data_out['size']*[None]
-    data_out['Pr_c'] = data_out['size']*[None]
-    data_out['gama'] = data_out['size']*[None]
-    data_out['M'] = data_out['size']*[None]
-    data_out['cp'] = data_out['size']*[None]
-    data_out['R'] = data_out['size']*[None]
-    data_out['h_g'] = data_out['size']*[None]
-    data_out['Re_c'] = data_out['size']*[None]
-    data_out['D_h'] = data_out['size']*[None]
-    data_out['mi_s'] = data_out['size']*[None]
-    data_out['h_c'] = data_out['size']*[None]
-    data_out['Aa'] = data_out['size']*[None]
-    data_out['Atotal'] = data_out['size']*[None]
-    data_out['m'] = data_out['size']*[None]
-    data_out['eta_f'] = data_out['size']*[None]
-    data_out['eta_o'] = data_out['size']*[None]
-    data_out['R_c'] = data_out['size']*[None]
-    data_out['R_g'] = data_out['size']*[None]
-    data_out['R_w'] = data_out['size']*[None]
-    data_out['q'] = data_out['size']*[None]
-    data_out['Q'] = data_out['size']*[None]
-    data_out['f'] = data_out['size']*[None]
-    data_out['ro'] = data_out['size']*[None]
-    data_out['V_c'] = data_out['size']*[None]
-    data_out['hl'] = data_out['size']*[None]
-    data_out['deltap'] = data_out['size']*[None]
-    data_out['T_static'] = data_out['size']*[None]
-    data_out['p_static'] = data_out['size']*[6000000]
-
-def calc_prop(data_in, data_out, chems, cpArray):
-
-    data_in['p0_pyCEA'] = data_in['p0']/1e5 #Conversão de [Pa] para [bar]
-    T0 = chems.T
-    cp0 = 
-    Pr0 = 
-    mi0 = 
-
-    Tc1 = data_in['Tc_primary']
+    state = CoolingState(data_out['size'])
+    state.Tc = data_in['Tc_primary']
+    state.Twg = data_in['Twg_primary']
+    state.Twc = data_in['Twc_primary']
+    state.Taw = data_in['Taw_primary']
+    state.p_static = 6000000
+    data_out['state'] = state
+    for name in CoolingState.fields: # data_out['Tc'] etc. stay available as views into the state
+        data_out[name] = state[name]
+
+def calc_prop(data_in, data_out, chems, transport):
+    '''
+    one pass of the cooling solver over every station
+    chems is the CEA chamber station, transport the TransportTable of the combustion gas at the chamber pressure and
+    mixture ratio, transportTables.getTransportTable(cea, data_in['p0']/1e5, data_in['of'])
+    '''
+    # chamber gas properties from the CEA chamber station (RunCEA units: cp in kJ/kgK, mu in millipoise)
+    T0 = chems.t
+    cp0 = chems.cp*1000
+    Pr0 = chems.pr
+    mi0 = chems.mu*1e-4
+
     IWT = data_in['IWT']
     k_w = data_in['k_w']
     mponto_c = data_in['m._c']
     e = data_in['e']
     p0 = data_in['p0']
+    coolant = getCoolant(data_in['coolant'])
 
-    Re_c = data_out['Re_c']
+    s = data_out['state']
     N = data_out['N']
-    mi_c = data_out['mi_c']
     CCW = data_out['CCW']
+    CCH = data_out['CCH']
     FT = data_out['FT']
-    D_h = data_out['D_h']
-    mi_s = data_out['mi_s']
-    Tc = data_out['Tc'] 
-    Twg = data_out['Twg']
-    Twc = data_out['Twc']
-    Taw = data_out['Taw']
-    h_c = data_out['h_c']
-    k_c = data_out['k_c']
-    Pr_c = data_out['Pr_c']
-    Aa = data_out['Aa']
     L = data_out['L']
     r1 = data_out['r1']
     r2 = data_out['r2']
-    r3 = data_out['r3']
-    Atotal = data_out['Atotal']
-    m = data_out['m']
-    eta_f = data_out['eta_f']
-    eta_o = data_out['eta_o']
-    R_c = data_out['R_c']
-    R_g = data_out['R_g']
-    R_w = data_out['R_w']
-    h_g = data_out['h_g']
-    q = data_out['q']
-    Q = data_out['Q']
-    cp_c = data_out['cp_c']
-    k_c = data_out['k_c']
-    f = data_out['f']
-    ro = data_out['ro']
-    V_c = data_out['V_c']
-    hl = data_out['hl']
-    deltap = data_out['deltap']
-    T_static = data_out['T_static']
-    p_static = data_out['p_static']
-    gama = data_out['gama']
-    M = data_out['M']
-    CCH = data_out['CCH']
-
-    data_out['p_drop'] = 0
-    
-    def f_mach(M):
-        A = 2/(data_out['gama'][i]+1)
-        B = 1+(((data_out['gama'][i]-1)/2)*(M**2))
-        C = (data_out['gama'][i]+1)/(data_out['gama'][i]-1)
-        D = (data_out['Ae/At'][i]*M)**2
-        return ( (A*B)**C-D )
-
-    def f_coolebrook(f):
-        return (1/(-2*math.log(((e/D_h[i])/3.7)+(2.51/(Re_c[i]*f**0.5)), 10))**2-f)
-
-    for i in reversed(range(0,data_out['size'])):
-        cp_c[i] = coolant_prop(data_in['coolant'], 'cp', Tc[i])
-        k_c[i] = coolant_prop(data_in['coolant'], 'k', data_out['Tc'][i])
-        data_out['mi_c'][i] = coolant_prop(data_in['coolant'], 'mi', data_out['Tc'][i])
-        data_out['Pr_c'][i] = data_out['cp_c'][i]*data_out['mi_c'][i]/data_out['k_c'][i]
-
-        pyCEA.calcPropCEA(data_out['Taw'][i] , data_in['p0_pyCEA'], data_in['fuel'], data_in['oxidizer'], data_in['of'], data_in['motor_name'])
-        data_out['cp'][i] = pyCEA.readPropCEA('cp', data_out['Taw'][i], data_in['p0_pyCEA'], data_in['fuel'], data_in['oxidizer'], data_in['of'], data_in['motor_name'])
-        #data_out['cp'][i] = -5.84399e-05*data_out['Taw'][i]**2.0 + 4.23454e-01*data_out['Taw'][i] + 1.29256e+03
-        data_out['gama'][i] = 1.23854e-8*data_out['Taw'][i]**2 - 8.09028e-5*data_out['Taw'][i] + 1.34563
-        #Gama para o L-75
-        #data_out['gama'][i] = pyCEA.readPropCEA('gama', data_out['Taw'][i], data_in['p0_pyCEA'], data_in['fuel'], data_in['oxidizer'], data_in['of'], data_in['motor_name'])
-        data_out['R'][i] = (data_out['cp'][i]*(1 - 1/data_out['gama'][i]))
-        mponto = data_in['p0']*data_out['At']*((data_out['gama'][i]/(data_out['R'][i]*T0))*(2/(data_out['gama'][i]+1))**((data_out['gama'][i]+1)/(data_out['gama'][i]-1)))**0.5
-        c = (data_in['p0']*data_out['At'])/mponto
-        if(data_out['z'][i] > data_out['zt']):
-            a = 1
-            b = 25
-        else:
-            a = 0
-            b = 1
-        data_out['M'][i] = optimize.bisect(f_mach, a, b, rtol=8.881784197001252e-16)
-        aux1 = 1 + ((data_out['gama'][i]-1)/2)*data_out['M'][i]**2
-        sigma = ((data_out['Twg'][i]/(2*T0))*aux1+0.5  )**-0.68  *  aux1**-0.12
-        data_out['h_g'][i] = (  0.026  *  ((mi0/(2*data_out['Rt']))**0.2)  *  (cp0/(Pr0**0.6))  *  (data_in['p0']/c)**0.8  *  (data_out['At']/data_out['Ae'][i])**0.9  *  sigma  )
-
-        D_h[i] = (4*CCW[i]*CCH[i])/(2*(CCW[i]+CCH[i]))
-        Re_c[i] = (4*mponto)/(N[i]*mi_c[i]*2*(CCW[i]+CCH[i]))
-
-        mi_s[i] = coolant_prop(data_in['coolant'], 'mi', Twc[i])
-        h_c[i] = ((k_c[i]/D_h[i]) * 0.027 * Re_c[i]**0.8 * Pr_c[i]**(1/3) * (mi_c[i]/mi_s[i])**0.14 )
-
-        Aa[i] = (2*CCH[i]*L[i])
-        Atotal[i] = (N[i]*Aa[i] + L[i]*(2*math.pi*r2[i]-N[i]*FT[i]))
-        m[i] = math.sqrt((2*h_c[i])/(k_c[i]*FT[i]))
-        eta_f[i] = (math.tanh(m[i]*CCH[i])/(m[i]*CCH[i]))
-        eta_o[i] = 1-((N[i]*Aa[i]*(1-eta_f[i])) / Atotal[i])
-
-        R_g[i] = (1/(2*math.pi*r1[i]*L[i]*h_g[i]))
-
-        R_w[i] = (math.log(r2[i]/r1[i]) / (2*math.pi*L[i]*k_w))
-
-        R_c[i] = (1 / (eta_o[i]*h_c[i]*Atotal[i]))
-
-        q[i] = ((Taw[i] - Tc[i]) / (R_g[i] + R_w[i] + R_c[i]))
-        Q[i] =  ( q[i]/(2*math.pi*r1[i]*L[i])/1000000 )
-
-        aux = 0.5*(data_out['gama'][i] - 1)*data_out['M'][i]**2
-        Taw[i] = (T0 * ((1 + Pr0**(1/3)*aux) / (1 + aux)))        
-        Twg[i] = -R_g[i]*q[i]+Taw[i]
-        Twc[i] = -q[i]*(R_g[i]+R_w[i])+Taw[i]
-
-        lista = reversed(range( i,data_out['size']))
-        Tc1 = 303
-        for j in lista:
-            Tc2 = (q[j] / (mponto_c*cp_c[j])) + Tc1
-            Tc[j] = (Tc2+Tc1)/2
-            Tc1 = Tc2
-
-        #calculation fo static pressure
-        p_static[i] = p0*(1+((gama[i]-1)/2)*M[i]**2)**-(gama[i]/(gama[i]-1))
-
-        #Cálculo da perda de carga
-        f[i] = optimize.bisect(f_coolebrook, 0.00001, 2, rtol=8.881784197001252e-16)
-        ro[i] = coolant_prop(data_in['coolant'], 'ro', Tc[i])
-        V_c[i] = mponto_c/(ro[i]*CCH[i]*CCW[i]*N[i])
-        hl[i] = f[i]*((L[i]/D_h[i])/(V_c[i]**2/2))
-        deltap[i] = ro[i]*hl[i]*N[i]
-        data_out['p_drop'] += deltap[i]
-
-        #Cálculo da temperatura estática e pressão estática
-        #calculation of static temperature
-        T_static[i] = T0*(1+((gama[i]-1)/2)*M[i]**2)**-1
+    AeAt = data_out['Ae/At']
+    At = data_out['At']
+
+    # every station is worked out from the previous pass's temperatures, so each formula is one array expression
+    s.cp_c = coolant.cp(s.Tc)
+    s.k_c = coolant.k(s.Tc)
+    s.mi_c = coolant.mu(s.Tc)
+    s.Pr_c = s.cp_c*s.mi_c/s.k_c
+
+    # gas properties at the adiabatic wall temperature
+    s.cp = transport.interpolate('cp', s.Taw)
+    s.gama = transport.interpolate('gam', s.Taw)
+    gama = s.gama
+    s.R = s.cp*(1 - 1/gama)
+    mponto = p0*At*((gama/(s.R*T0))*(2/(gama+1))**((gama+1)/(gama-1)))**0.5
+    c = (p0*At)/mponto
+
+    # same area-mach solve as the main flow, every station at once on the branch of its side of the throat
+    s.M, data_out['mach_iterations'], data_out['mach_converged'] = solveMachArray(AeAt, gama, supersonic = data_out['z'] > data_out['zt'])
+    if not data_out['mach_converged'].all():
+        print(f"calc_prop: {np.count_nonzero(~data_out['mach_converged'])} mach stations did not converge")
+    M = s.M
+    aux1 = 1 + ((gama-1)/2)*M**2
+    sigma = ((s.Twg/(2*T0))*aux1+0.5  )**-0.68  *  aux1**-0.12
+    s.h_g = (  0.026  *  ((mi0/(2*data_out['Rt']))**0.2)  *  (cp0/(Pr0**0.6))  *  (p0/c)**0.8  *  (At/data_out['Ae'])**0.9  *  sigma  )
+
+    s.D_h = (4*CCW*CCH)/(2*(CCW+CCH))
+    s.Re_c = (4*mponto)/(N*s.mi_c*2*(CCW+CCH))
+
+    # dittus-boelter with the sieder-tate wall viscosity correction
+    s.mi_s = coolant.mu(s.Twc)
+    s.h_c = ((s.k_c/s.D_h) * 0.027 * s.Re_c**0.8 * s.Pr_c**(1/3) * (s.mi_c/s.mi_s)**0.14 )
+
+    # fin efficiency of the channel walls
+    s.Aa = (2*CCH*L)
+    s.Atotal = (N*s.Aa + L*(2*math.pi*r2-N*FT))
+    s.m = np.sqrt((2*s.h_c)/(s.k_c*FT))
+    s.eta_f = (np.tanh(s.m*CCH)/(s.m*CCH))
+    s.eta_o = 1-((N*s.Aa*(1-s.eta_f)) / s.Atotal)
+
+    # gas film, wall and coolant thermal resistances in series
+    s.R_g = (1/(2*math.pi*r1*L*s.h_g))
+    s.R_w = (np.log(r2/r1) / (2*math.pi*L*k_w))
+    s.R_c = (1 / (s.eta_o*s.h_c*s.Atotal))
+
+    s.q = ((s.Taw - s.Tc) / (s.R_g + s.R_w + s.R_c))
+    s.Q =  ( s.q/(2*math.pi*r1*L)/1000000 )
+
+    aux = 0.5*(gama - 1)*M**2
+    s.Taw = (T0 * ((1 + Pr0**(1/3)*aux) / (1 + aux)))
+    s.Twg = -s.R_g*s.q+s.Taw
+    s.Twc = -s.q*(s.R_g+s.R_w)+s.Taw
+
+    #calculation fo static pressure
+    s.p_static = p0*(1+((gama-1)/2)*M**2)**-(gama/(gama-1))
+
+    #Cálculo da perda de carga
+    s.f = colebrook_friction(s.Re_c, e/s.D_h)
+
+    #Cálculo da temperatura estática e pressão estática
+    #calculation of static temperature
+    s.T_static = T0*(1+((gama-1)/2)*M**2)**-1
+
+    # coolant energy balance in one cumulative pass: the coolant enters at the last station and every station heats it
+    # by q/(m._c*cp_c), Tc is the mean of the temperatures entering and leaving the station
+    Tc_inlet = 303
+    rise = s.q / (mponto_c*s.cp_c)
+    Tc_out = np.cumsum(np.concatenate(([Tc_inlet], rise[::-1])))[::-1] # Tc_out[i] leaves station i, Tc_out[size] is the inlet
+    s.Tc = (Tc_out[:-1] + Tc_out[1:])/2
+
+    s.ro = coolant.rho(s.Tc)
+    s.V_c = mponto_c/(s.ro*CCH*CCW*N)
+    s.hl = s.f*((L/s.D_h)/(s.V_c**2/2))
+    s.deltap = s.ro*s.hl*N
+    data_out['p_drop'] = np.sum(s.deltap)
 
 #iterations of the cooling channel calculations until it converges to a temperature
-def iteration(data_in , data_out, chems, cpArray):
+def iteration(data_in , data_out, chems, transport):
     geometry(data_in, data_out)
     if data_out['error_code'] != 0:
         print('CCW <= 0')
@@ -340,7 +307,7 @@ def iteration(data_in , data_out, chems, cpArray):
     create_prop(data_in, data_out)
     for i in range(0,data_in['max_iterations']):
         print('Iteration {}'.format(i+1))
-        calc_prop(data_in, data_out, chems, cpArray)
+        calc_prop(data_in, data_out, chems, transport)
         if i==0: #first iteration edge case
             Tc_0 = sum(data_out['Q'])
             Twg_0 = sum(data_out['Twg'])
@@ -372,7 +339,7 @@ def iteration(data_in , data_out, chems, cpArray):
     print('Total Iteration Temperature: ' + str(i+1))
 
 
-def optimize_channel2(data_in, data_out, chems, cpArray):
+def optimize_channel2(data_in, data_out, chems, transport):
     flag1 = False
     flag2 = False
     if data_in['dim_constant'] == 'FT':
@@ -396,7 +363,7 @@ def optimize_channel2(data_in, data_out, chems, cpArray):
     dim = (dim_max+data_in[dim_const + '_min'])/2
     x = np.array([data_in['CCH'] , dim])
     data_in[dim_const] = dim
-    iteration(data_in, data_out, chems, cpArray)
+    iteration(data_in, data_out, chems, transport)
     Q = max(data_out['Q'])
     Q_prev = Q
     Q0 = Q
@@ -422,7 +389,7 @@ def optimize_channel2(data_in, data_out, chems, cpArray):
 
         data_in['CCH'] = xn[0]
         data_in[dim_const] = xn[1]
-        iteration(data_in, data_out, chems, cpArray)
+        iteration(data_in, data_out, chems, transport)
         Q = max(data_out['Q'])
         if Q-Q_prev < 0:
             w=w*-1
@@ -1,34 +1,41 @@
-import rocketcea.py_cea as py_cea
+from .ceaCache import CEACache, caseKey
 
 class RunCEA:
-    aeat = None # area of exit/area of throat
-    rho = None #density
-    h = None #enthalpy
-    s = None #entropy
-    gam = None #molar heat capacity
-    g = None #gibb's free energy
-    u = None #internal energy
-    m = None #molar mass
-    mw = None #molecular weight = 1/m
-    p = None #pressure in bar... is converted to Pa in rocket
-    son = None #speed of sound
-    cp = None #specific heat capacity (constant pressure)
-    t = None #temperature
-    ae = None #exit area
-    cf = None #function of nozzle
-    ivac = None #specific impulse (exit velocity) if the rocket were in space
-    mach = None #mach number
-    pip = None #pressure ratio to chamber
-    isp = None #the exhaust velocity of the gas (m/s)
-    a = None #area
-    d = None #diameter
-    mu = None #viscosity
-    Pr = None #prandtl number
-    Cstar = None
-    raw_cea_output = None
-    rbar = None
-    pr = None
-    test = None
+    # one CEA station, a __slots__ record so the thousands of stations a sweep keeps stay small
+    __slots__ = ('aeat', 'rho', 'h', 's', 'gam', 'g', 'u', 'm', 'mw', 'p', 'son', 'cp', 't', 'ae', 'cf', 'ivac', 'mach', 'pip', 'isp',
+        'a', 'd', 'mu', 'Pr', 'Cstar', 'raw_cea_output', 'rbar', 'pr', 'test', 'error')
+    cache = CEACache() # shared by every create call, set to None to always run CEA or to CEACache(cacheDir=...) to keep results on disk
+
+    def __init__(self):
+        self.aeat = None # area of exit/area of throat
+        self.rho = None #density
+        self.h = None #enthalpy
+        self.s = None #entropy
+        self.gam = None #molar heat capacity
+        self.g = None #gibb's free energy
+        self.u = None #internal energy
+        self.m = None #molar mass
+        self.mw = None #molecular weight = 1/m
+        self.p = None #pressure in bar... is converted to Pa in rocket
+        self.son = None #speed of sound
+        self.cp = None #specific heat capacity (constant pressure)
+        self.t = None #temperature
+        self.ae = None #exit area
+        self.cf = None #function of nozzle
+        self.ivac = None #specific impulse (exit velocity) if the rocket were in space
+        self.mach = None #mach number
+        self.pip = None #pressure ratio to chamber
+        self.isp = None #the exhaust velocity of the gas (m/s)
+        self.a = None #area
+        self.d = None #diameter
+        self.mu = None #viscosity
+        self.Pr = None #prandtl number
+        self.Cstar = None
+        self.raw_cea_output = None
+        self.rbar = None
+        self.pr = None
+        self.test = None
+        self.error = None # relative error estimate of every property when the station was interpolated (CEATable)
 
     def initCalculations(self):
         #print('m:{}'.format(self.m))
@@ -43,6 +50,13 @@ class RunCEA:
             PcOvPe = None
         else:
             PcOvPe = Pc/pAmbient
+        cache = RunCEA.cache
+        if cache is not None:
+            key = caseKey(cea, Pc, Mr, ae, PcOvPe, frozen, frozenAtThroat)
+            stations = cache.get(key)
+            if stations is not None:
+                return [RunCEA.fromDict(station) for station in stations]
+        import rocketcea.py_cea as py_cea # imported here so the other backends work without the fortran build
         cea.setupCards(Pc=Pc, MR=Mr, eps=ae, PcOvPe=PcOvPe, frozen=frozen, short_output=1, frozenAtThroat = frozenAtThroat, pc_units='bar', output='KJ', show_transport=1)
         #cea.setupCards(Pc=Pc, MR=Mr, eps=ae, PcOvPe=PcOvPe, frozen=frozen, short_output=1, frozenAtThroat = frozenAtThroat)
         chems = []
@@ -72,8 +86,20 @@ class RunCEA:
             rrr.rbar = rrr.initCalculations()
             rrr.test = py_cea.trpts.preql  #debugging variable
             chems.append(rrr)
-        
+        if cache is not None:
+            cache.put(key, [rrr.toDict() for rrr in chems])
         return chems
+
+    def toDict(self):
+        #plain python values so the station can be stored as json, unset fields are left out
+        return {name: value.tolist() if hasattr(value, 'tolist') else value for name in RunCEA.__slots__ if (value := getattr(self, name)) is not None}
+
+    @staticmethod
+    def fromDict(station):
+        rrr = RunCEA()
+        for name, value in station.items():
+            setattr(rrr, name, list(value) if isinstance(value, list) else value)
+        return rrr
         
     def __repr__(self):
         return  f'''\n aeat={self.aeat} 
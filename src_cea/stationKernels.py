@@ -0,0 +1,51 @@
+import numpy as np
+'''
+array kernels for the quasi-1D flow and bartz heat transfer along the contour
+every function takes whole station arrays (mach, diameter, temperature...) and returns whole arrays
+used by ThrustLevel (src_cea) and Rocket (src)
+'''
+
+def stagnationState(t, p, rho, mach, gam):
+    #stagnation temperature, pressure and density from a station with a known mach number
+    aux = 1 + (gam - 1) / 2 * mach**2
+    return t * aux, p * aux**(gam / (gam - 1)), rho * aux**(1 / (gam - 1))
+
+def isentropicStations(mach, gam, t_stag, p_stag, rho_stag = None):
+    #static temperature, pressure and density at every station
+    aux = 1 + (gam - 1) / 2 * np.asarray(mach)**2
+    temp = t_stag / aux
+    pressure = p_stag * aux**(-gam / (gam - 1))
+    density = None if rho_stag is None else rho_stag * aux**(-1 / (gam - 1))
+    return temp, pressure, density
+
+def bartzSigma(t_gas, t_wall, gam, mach):
+    #boundary layer property correction factor of the bartz equation
+    aux = 1 + (gam - 1) / 2 * mach**2
+    return 1 / ((0.5 * (t_wall / t_gas) * aux + 0.5)**0.68 * aux**0.12)
+
+def bartz(d_throat, p_chamber, c_star, d, c_p, visc, Pr, sigma):
+    '''
+    bartz heat transfer coefficient with the sigma correction, SI units
+    https://arc.aiaa.org/doi/pdf/10.2514/8.12572
+    '''
+    return (0.026 / d_throat**0.2) * ((c_p * visc**0.2) / Pr**0.6) * (p_chamber / c_star)**0.8 * (d_throat / d)**1.8 * sigma
+
+def bartzSimple(d_throat, p_chamber, c_star, d, c_p, visc, t_gas, t_wall):
+    #original bartz approximation using the boundary layer film temperature instead of sigma
+    t_boundary = (t_gas + t_wall) / 2
+    return (0.026 / d_throat**0.2 * (p_chamber / c_star)**0.8 * (d_throat / d)**1.8 * c_p * visc**0.2 * (t_gas / t_boundary)**(0.8 - 0.2 * 0.6))
+
+def heatFlux(h_g, t_gas, t_wall):
+    return h_g * (t_gas - t_wall)
+
+def stationKernel(mach, d, gam, t_stag, p_stag, rho_stag, d_throat, p_chamber, c_star, c_p, visc, Pr, t_wall):
+    '''
+    one pass over every station
+    mach and d (local diameter) are station arrays, the rest are scalars or arrays that broadcast against them
+    pressures in the units given, p_chamber in Pa for bartz
+    returns temp, pressure, density, sigma, h_g, heat flux
+    '''
+    temp, pressure, density = isentropicStations(mach, gam, t_stag, p_stag, rho_stag)
+    sigma = bartzSigma(temp, t_wall, gam, mach)
+    h_g = bartz(d_throat, p_chamber, c_star, d, c_p, visc, Pr, sigma)
+    return temp, pressure, density, sigma, h_g, heatFlux(h_g, temp, t_wall)
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+'''
+station profiles along the contour for one or more thrust levels
+every profile shares one x axis, so instead of a 2xN [x, value] array per field the levels are kept in one contiguous
+block shaped (levels, 1 + fields, N) whose row 0 is x. the 2xN arrays ThrustLevel has always exposed (mach_arr,
+temp_arr, ...) are read only views into the block, nothing is copied.
+dtype = np.float32 halves the memory again, x is then only good to about 1e-7 of the contour length
+'''
+
+profileFields = ('mach', 'temp', 'pressure', 'density', 'sigma', 'h_g', 'heat_flux', 'heat_load')
+
+class StationProfiles:
+    __slots__ = ('data', 'fields')
+
+    def __init__(self, x, levels = 1, dtype = np.float64, fields = profileFields, data = None):
+        self.fields = tuple(fields)
+        if data is None:
+            data = np.full((levels, 1 + len(self.fields), len(x)), np.nan, dtype=dtype)
+            data[:, 0, :] = x
+        self.data = data
+
+    @property
+    def x(self):
+        return self.data[0, 0]
+
+    @property
+    def levels(self):
+        return self.data.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def row(self, name):
+        return 1 + self.fields.index(name)
+
+    def set(self, name, values, level = None):
+        #values is one row (every level gets it unless level is given) or one row per level
+        if level is None:
+            self.data[:, self.row(name), :] = values
+        else:
+            self.data[level, self.row(name), :] = values
+
+    def get(self, name, level = 0):
+        return self.data[level, self.row(name)]
+
+    def pair(self, name, level = 0):
+        #read only 2xN [x, values] view, the shape of ThrustLevel's *_arr arrays
+        k = self.row(name)
+        view = as_strided(self.data[level], shape=(2, self.data.shape[2]), strides=(k * self.data.strides[1], self.data.strides[2]))
+        view.flags.writeable = False
+        return view
+
+    def level(self, i):
+        #profiles of one level, sharing memory with this block
+        return StationProfiles(None, fields=self.fields, data=self.data[i:i + 1])
+
+    def isSet(self, name):
+        return not np.isnan(self.data[:, self.row(name)]).all()
+
+    def columns(self, level = 0):
+        #dict of x and every field that was set, for export
+        columns = {'x': self.x}
+        columns.update({name: self.get(name, level) for name in self.fields if self.isSet(name)})
+        return columns
+
+    def save(self, path):
+        #written to a temp file first so other processes never see a half written file
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, data=self.data, fields=np.array(self.fields))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            return StationProfiles(None, fields=data['fields'].tolist(), data=data['data'])
+
+    def __repr__(self):
+        return f'StationProfiles(levels={self.levels}, stations={self.data.shape[2]}, {self.data.dtype}, {self.nbytes / 1e6:.2f} MB)'
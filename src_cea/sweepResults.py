@@ -0,0 +1,138 @@
+import os
+import tempfile
+import numpy as np
+from .ceaTable import tableProperties
+'''
+columnar store for sweep results
+every station property of a case becomes its own float64 column named station_property (cham_t, thr_p, exit_mach, ...)
+so a sweep is a handful of flat arrays instead of a frame of RunCEA objects. inputs keep their own dtype (strings for
+propellant and nozzle names, floats for the rest), a case that failed has nan outputs and its message in 'error'.
+    results['exit_p']                  one column as an array
+    results.select(results['thrust'] > 3000)   the rows where the mask is true
+    results.toFrame()                  pandas DataFrame (pandas is only imported here)
+    results.summary()                  text table of the column ranges, without pandas
+    results.save('sweep.npz') / SweepResults.load('sweep.npz', columns=['Mr', 'thrust'])
+.npz files are read one column at a time, so load only decompresses the columns asked for. paths ending in .parquet
+are written and read with pyarrow when it is installed.
+'''
+
+stationNames = ('inj', 'cham', 'thr', 'exit')
+scalarOutputs = ('thrust', 'isp_s')
+outputColumns = scalarOutputs + tuple(f'{station}_{name}' for station in stationNames for name in tableProperties)
+
+def stationSummary(engine):
+    #flat float values sent back from a worker instead of station objects, used as the runCases collect function
+    thr = engine.max
+    values = {name: getattr(thr, name) for name in scalarOutputs}
+    for station in stationNames:
+        chem = getattr(thr, station, None)
+        for name in tableProperties:
+            values[f'{station}_{name}'] = getattr(chem, name, None)
+    return values
+
+def _column(values):
+    #float64 when every value is a number (None becomes nan), strings otherwise
+    try:
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+    except (TypeError, ValueError):
+        return np.array(['' if value is None else str(value) for value in values])
+
+class SweepResults:
+    def __init__(self, columns):
+        #columns is a dict of name -> 1d array, every column has one row per case
+        self.columns = {name: np.asarray(value) for name, value in columns.items()}
+        lengths = {len(value) for value in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f'every column needs the same length, got {sorted(lengths)}')
+
+    @staticmethod
+    def fromCases(inputs, results, inputNames = None):
+        '''
+        inputs is a list of dicts of the swept values of every case, results the matching runCases output
+        (collected with stationSummary), inputNames picks and orders the input columns (all keys by default)
+        '''
+        if inputNames is None:
+            inputNames = list(inputs[0]) if inputs else []
+        columns = {name: _column([case[name] for case in inputs]) for name in inputNames}
+        outputs = np.full((len(results), len(outputColumns)), np.nan)
+        errors = np.full(len(results), '', dtype=object)
+        for i, result in enumerate(results):
+            if result['ok']:
+                outputs[i] = [np.nan if result['result'].get(name) is None else result['result'][name] for name in outputColumns]
+            else:
+                errors[i] = result['error']
+        for j, name in enumerate(outputColumns):
+            columns[name] = outputs[:, j]
+        columns['error'] = errors.astype(str)
+        return SweepResults(columns)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def names(self):
+        return list(self.columns)
+
+    @property
+    def ok(self):
+        #True for the cases that ran
+        return self['error'] == '' if 'error' in self else np.ones(len(self), dtype=bool)
+
+    def select(self, rows, columns = None):
+        #rows is a boolean mask or index array, columns a list of names (all by default)
+        names = self.names() if columns is None else list(columns)
+        return SweepResults({name: self.columns[name][rows] for name in names})
+
+    def toFrame(self, columns = None):
+        import pandas as pd # only loaded when a frame is asked for
+        names = self.names() if columns is None else list(columns)
+        return pd.DataFrame({name: self.columns[name] for name in names})
+
+    def summary(self):
+        #text table of every column, the range of numeric columns and the distinct values of the others
+        lines = [repr(self)]
+        for name, values in self.columns.items():
+            if values.dtype.kind in 'fiub':
+                finite = values[np.isfinite(values)] if values.dtype.kind == 'f' else values
+                if len(finite):
+                    lines.append(f'{name:<20}min {np.min(finite):<14.6g}mean {np.mean(finite):<14.6g}max {np.max(finite):.6g}')
+                else:
+                    lines.append(f'{name:<20}no values')
+            else:
+                distinct = sorted(set(values.tolist()))
+                lines.append(f"{name:<20}{', '.join(repr(value) for value in distinct[:8])}{' ...' if len(distinct) > 8 else ''}")
+        return '\n'.join(lines)
+
+    def save(self, path):
+        #written to a temp file first so other processes never see half a sweep
+        folder = os.path.dirname(os.path.abspath(path))
+        parquet = path.endswith('.parquet')
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.parquet' if parquet else '.npz')
+        with os.fdopen(fd, 'wb') as f:
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                pq.write_table(pa.table(self.columns), f)
+            else:
+                np.savez_compressed(f, **self.columns)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path, columns = None):
+        #columns is a list of names to read, all columns by default
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            table = pq.read_table(path, columns=columns)
+            return SweepResults({name: table.column(name).to_numpy() for name in table.column_names})
+        with np.load(path) as data:
+            names = data.files if columns is None else list(columns)
+            return SweepResults({name: data[name] for name in names})
+
+    def __repr__(self):
+        failed = int(len(self) - self.ok.sum())
+        return f'SweepResults({len(self)} cases, {len(self.columns)} columns, {failed} failed)'
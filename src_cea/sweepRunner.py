@@ -0,0 +1,211 @@
+import os
+import json
+import hashlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import instrumentation
+'''
+runs many Engine cases in worker processes
+rocketcea keeps its results in fortran common blocks, so cases can only run in parallel in separate processes.
+every worker keeps one CEA_Obj per propellant combination and reuses it for all the cases it is given, cases are sent
+to the workers in chunks and a case that raises only marks that case as failed.
+a case is a dict of Engine arguments, e.g. {'title':..., 'fuel':..., 'ox':..., 'nozzle_type':..., 'Mr':..., ...}
+on windows and mac the worker processes re-import the calling script, so scripts that use workers > 1 need to run
+the sweep under if __name__ == '__main__':
+streamCases yields results as they finish and can keep a checkpoint log, a sweep restarted with the same log only
+runs the cases that are not in it yet
+'''
+
+_ceaObjects = {} # CEA_Obj per (ox, fuel, fac_CR, customFuel) in this process
+
+def getCEA(ox, fuel, fac_CR = None, customFuel = None):
+    key = (ox, fuel, fac_CR, None if customFuel is None else tuple(customFuel))
+    if key not in _ceaObjects:
+        from rocketcea.cea_obj import CEA_Obj, add_new_fuel
+        if customFuel is not None:
+            add_new_fuel(customFuel[0], customFuel[1])
+        _ceaObjects[key] = CEA_Obj(oxName=ox, fuelName=fuel, fac_CR=fac_CR)
+    return _ceaObjects[key]
+
+def engineSummary(engine):
+    #default values sent back from a worker, the full Engine is not sent to keep results small
+    return {'thrust': engine.max.thrust, 'isp_s': engine.max.isp_s, 'inj': engine.max.inj, 'cham': engine.max.cham, 'thr': engine.max.thr, 'exit': engine.max.exit}
+
+def runEngineCase(case, collect = engineSummary):
+    '''
+    builds one Engine from the case dict and returns {'ok': True, 'result': collect(engine)}
+    or {'ok': False, 'error': ..., 'traceback': ...} if anything in the case raised
+    '''
+    from .engine import Engine
+    try:
+        cea = None # backends like IdealGasBackend run without a CEA_Obj (or rocketcea)
+        if getattr(case.get('backend'), 'needsCEA', True):
+            cea = getCEA(case['ox'], case['fuel'], case.get('fac_CR'), case.get('customFuel'))
+        engine = Engine(**case, cea = cea)
+        return {'ok': True, 'result': collect(engine)}
+    except Exception as e:
+        return {'ok': False, 'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc()}
+
+def runChunk(chunk, collect = engineSummary):
+    return [runEngineCase(case, collect) for case in chunk]
+
+def runTimedChunk(chunk, collect = engineSummary):
+    #runs a chunk in a worker with instrumentation on and sends its stage times back with the results
+    instrumentation.enable()
+    instrumentation.reset()
+    results = runChunk(chunk, collect)
+    return results, instrumentation.report()['stages']
+
+def caseId(case):
+    #stable id of a case dict, the same case gets the same id in every run
+    text = json.dumps(case, sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()[:20]
+
+def _jsonValue(value):
+    #numpy scalars and arrays from collect functions
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f'{type(value).__name__} can not be written to a sweep log, use a collect function that returns plain values')
+
+class SweepLog:
+    '''
+    append only json lines file of finished cases, one {"id", "index", "ok", ...} object per line
+    lines are buffered and written batchSize at a time (and on flush/close), a line cut off by a crash is ignored
+    when the log is read back and cut off the file before the next write. results have to be json serializable, so sweeps that log use stationSummary style
+    collect functions instead of engineSummary
+    '''
+    def __init__(self, path, batchSize = 50):
+        self.path = path
+        self.batchSize = batchSize
+        self._pending = []
+
+    def read(self):
+        #id -> result of every case already in the log
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue # half written line from an interrupted run
+                done[entry.pop('id')] = entry
+        return done
+
+    def dropTornLine(self):
+        #cuts off a last line left without its newline by a crash, otherwise the next record would be glued onto it
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            end = size - 1
+            while end > 0: # back to the last complete line, a block at a time so long logs are not read in full
+                start = max(0, end - 65536)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b'\n')
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            f.truncate(end)
+
+    def append(self, id, index, result):
+        self._pending.append(json.dumps(dict(result, id=id, index=index), default=_jsonValue))
+        if len(self._pending) >= self.batchSize:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self.dropTornLine()
+        with open(self.path, 'a') as f:
+            f.write('\n'.join(self._pending) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending.clear()
+
+def _chunkResults(future, timed):
+    if timed:
+        results, stages = future.result()
+        for path, stage in stages.items():
+            instrumentation.record(path, stage['wall'], stage['cpu'], stage['calls'])
+        return results
+    return future.result()
+
+def streamCases(cases, workers = None, chunksize = None, collect = engineSummary, log = None, batchSize = 50):
+    '''
+    generator version of runCases, yields (index, result) for every case as soon as its chunk finishes,
+    so the order is the order cases finish in
+    log is a path (or SweepLog) of a checkpoint file, cases already in it are yielded from the log without running
+    them again and every new result is appended to it, so an interrupted sweep picks up where it stopped
+    '''
+    cases = list(cases)
+    if isinstance(log, str):
+        log = SweepLog(log, batchSize)
+    ids = [caseId(case) for case in cases]
+    todo = list(range(len(cases)))
+    if log is not None:
+        done = log.read()
+        todo = []
+        for i, id in enumerate(ids):
+            if id in done:
+                result = done[id]
+                result.pop('index', None)
+                yield i, result
+            else:
+                todo.append(i)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    try:
+        if workers <= 1 or len(todo) <= 1:
+            for i in todo:
+                result = runEngineCase(cases[i], collect)
+                if log is not None:
+                    log.append(ids[i], i, result)
+                yield i, result
+            return
+        if chunksize is None:
+            chunksize = max(1, len(todo) // (workers * 4))
+        chunks = [todo[start:start + chunksize] for start in range(0, len(todo), chunksize)]
+        timed = instrumentation.enabled # worker stage times are added to this process's registry
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(runTimedChunk if timed else runChunk, [cases[i] for i in chunk], collect): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                crashed = False
+                try:
+                    results = _chunkResults(future, timed)
+                except Exception as e: # the worker itself died (e.g. a crash inside CEA), every case in its chunk is marked failed
+                    error = {'ok': False, 'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc()}
+                    results = [dict(error) for i in chunk]
+                    crashed = True
+                for i, result in zip(chunk, results):
+                    if log is not None and not crashed: # cases of a dead worker are run again on resume
+                        log.append(ids[i], i, result)
+                    yield i, result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True) # chunks not started yet are dropped on an interrupt
+    finally:
+        if log is not None:
+            log.flush()
+
+def runCases(cases, workers = None, chunksize = None, collect = engineSummary, log = None):
+    '''
+    runs every case and returns the results in the same order as cases
+    workers is the number of processes (None uses every core, 1 runs in this process without a pool)
+    chunksize is the number of cases sent to a worker at once, by default every worker gets about 4 chunks
+    collect must be a module level function so it can be sent to the workers
+    log is an optional checkpoint file, see streamCases
+    '''
+    cases = list(cases)
+    results = [None] * len(cases)
+    for i, result in streamCases(cases, workers, chunksize, collect, log):
+        results[i] = result
+    return results
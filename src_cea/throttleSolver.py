@@ -0,0 +1,58 @@
+from .runCEA import RunCEA
+from .instrumentation import span
+'''
+throttle point solver
+for a fixed nozzle (ae) the exit pressure is close to proportional to the chamber pressure, so a secant iteration on
+Pc started from the exit to chamber pressure ratio of the last solved point usually lands within tolerance in 1 or 2
+CEA runs. once the root is bracketed, steps that leave the bracket are replaced by bisection, and so is any step after
+two that did not halve the bracket between them.
+only the exit station of the CEA run is used while iterating, the full ThrustLevel is built once at the solution
+'''
+
+def exitPressure(cea, Pc, Mr, ae, frozen = 1, backend = None):
+    #exit pressure in bar for a nozzle of area ratio ae, the exit is always the last CEA station
+    if backend is None:
+        backend = RunCEA
+    with span('cea'):
+        return backend.create(cea, Pc, Mr, ae = ae, frozen = frozen)[-1].p
+
+def solveChamberPressure(pExit, target, guess, tol = 1e-4, maxIter = 50):
+    '''
+    finds Pc with pExit(Pc) = target to within tol (bar)
+    pExit is a function of Pc, guess is the starting Pc
+    returns Pc, pExit(Pc), number of pExit calls
+    '''
+    x0 = guess
+    p0 = pExit(x0)
+    calls = 1
+    f0 = p0 - target
+    if abs(f0) <= tol:
+        return x0, p0, calls
+    lo = hi = None # bracket, f(lo) < 0 < f(hi)
+    widths = [] # bracket width after every call once the root is bracketed
+    if f0 < 0:
+        lo = x0
+    else:
+        hi = x0
+    x1 = x0 * target / p0 # exit pressure proportional to chamber pressure
+    for i in range(maxIter):
+        p1 = pExit(x1)
+        calls += 1
+        f1 = p1 - target
+        if abs(f1) <= tol:
+            return x1, p1, calls
+        if f1 < 0:
+            lo = x1 if lo is None or x1 > lo else lo
+        else:
+            hi = x1 if hi is None or x1 < hi else hi
+        x2 = x1 - f1 * (x1 - x0) / (f1 - f0) if f1 != f0 else x1 * target / p1
+        if lo is not None and hi is not None:
+            widths.append(abs(hi - lo))
+            # secant steps from one side of a curved pExit can creep along the bracket, bisect when it has not halved in two steps
+            if not min(lo, hi) < x2 < max(lo, hi) or (len(widths) > 2 and widths[-1] > widths[-3] / 2):
+                x2 = (lo + hi) / 2
+        elif x2 <= 0:
+            x2 = x1 / 2
+        x0, f0, x1 = x1, f1, x2
+    print(f'throttle solver did not converge, exit pressure {f0 + target} bar for target {target} bar')
+    return x0, f0 + target, calls
@@ -1,29 +1,52 @@
 import math
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy as sp
-import time
-from scipy.optimize import fsolve
-from rocketcea.cea_obj import CEA_Obj
 #from .chemistryCEA import ChemistryCEA
 from .runCEA import RunCEA
+from .machTables import solveMachTable, getMachTable
+from .machSolver import solveMachArray
+from .instrumentation import span, debug
+from .heatLoad import HeatLoadIntegrator
+from .stationProfiles import StationProfiles
+from .stationKernels import stagnationState, isentropicStations, bartzSigma, bartz, heatFlux, stationKernel
 #from .mylibrcc import optimize_channel2
 
+def profile(name):
+    #[x, value] station array kept in the level's StationProfiles, None until it is computed
+    def get(self):
+        if self.profiles is None or not self.profiles.isSet(name):
+            return None
+        return self.profiles.pair(name)
+    def set(self, value):
+        self.setProfile(name, value)
+    return property(get, set)
+
 class ThrustLevel:
-    def __init__(self, fuel, cea, pCham, mr, mdot, area_arr, pAmbient = None, ae = None, frozen = 1, eta = 1):
+    profileDtype = np.float64 # np.float32 halves the memory of the station profiles
+
+    mach_arr = profile('mach')
+    temp_arr = profile('temp')
+    pressure_arr = profile('pressure')
+    density_arr = profile('density')
+    sigma_arr = profile('sigma')
+    h_g_arr = profile('h_g')
+    heat_flux_arr = profile('heat_flux')
+    heat_load_arr = profile('heat_load')
+
+    def __init__(self, fuel, cea, pCham, mr, mdot, area_arr, pAmbient = None, ae = None, frozen = 1, eta = 1, backend = None):
         self.temp1 = 0
+        if backend is None: # anything with RunCEA.create's call and returns, e.g. a CEATable
+            backend = RunCEA
         if ae == None:
             #print('chamber pressure:{}\nambient pressure:{}'.format(pCham, pAmbient))
-            st = time.time()
-            chems = RunCEA.create(cea, pCham, mr, pAmbient = pAmbient, frozen = frozen)
-            et = time.time()
-            print(f'RunCEA runtime" {et-st}s')
+            with span('cea'):
+                chems = backend.create(cea, pCham, mr, pAmbient = pAmbient, frozen = frozen)
         else:
             self.ambientP = pAmbient
             #print('chamber pressure:{}\nae:{}'.format(pCham, ae))
-            chems = RunCEA.create(cea, pCham, mr, ae = ae, frozen = frozen)
+            with span('cea'):
+                chems = backend.create(cea, pCham, mr, ae = ae, frozen = frozen)
         self.inj = None # injector
-        if cea.fac_CR is not None: #finite area combustor
+        if getattr(cea, 'fac_CR', None) is not None: #finite area combustor
             self.inj = chems[0] #injector
             self.cham = chems[1] # converging starts (end of chamber)
             self.thr = chems[2] # throat
@@ -44,14 +67,10 @@ class ThrustLevel:
         self.pAmbient = pAmbient
         self.contour = None
         self.area_arr = area_arr
-        self.mach_arr = []
-        self.pressure_arr = None
-        self.temp_arr = None
-        self.density_arr = None
+        self.profiles = None # station profiles along the contour (mach_arr, temp_arr, ... are views into it)
         self.ox = None
-        self.h_g_arr = []
-        self.heat_flux_arr = []
         self.total_watts = 0
+        self.region_watts = {}
         self.max_fuel_heat = 0
         self.Cstar = self.cham.Cstar
         self.eta = eta
@@ -112,6 +131,15 @@ class ThrustLevel:
         return IspAmb/9.8, mode
     '''
 
+    def setProfile(self, name, value):
+        #stores a 2xN [x, value] array, a new x axis starts a new profiles block
+        value = np.asarray(value)
+        x = value[0]
+        # compared in the block's dtype, a float32 block keeps x rounded and a float64 x of the same contour must match it
+        if self.profiles is None or self.profiles.data.shape[2] != len(x) or np.any(self.profiles.x[[0, -1]] != x[[0, -1]].astype(self.profiles.data.dtype)):
+            self.profiles = StationProfiles(x, dtype = self.profileDtype)
+        self.profiles.set(name, value[1])
+
     def filmCoolingCalcs(self, fuel_delta_t, fuel, filmCoolingPercent):
         self.filmCoolingPercent = filmCoolingPercent
         self.fuel_delta_t = fuel_delta_t
@@ -126,31 +154,19 @@ class ThrustLevel:
         else:
             self.isp_adjusted = None
 
-    def heatCalcs(self, area_arr, contour, wall_temp, mr):
+    def heatCalcs(self, area_arr, contour, wall_temp, mr, heatLoad = None):
         self.area_arr = area_arr
         self.contour = contour
+        self.heatLoad = heatLoad if heatLoad is not None else HeatLoadIntegrator(contour) # shared by every thrust level on the same contour
         self.wall_temp = wall_temp #NOTE: variable not used yet
         self.mr = mr
-        st = time.time()
-        self.mach_arr = self.solveMach()
-        et = time.time()
-        print(f'solveMach run time" {et-st}s')
-        st = time.time()
-        self.temp_arr, self.pressure_arr = self.tempPressureDensity()
-        et = time.time()
-        print(f'tempPressureDensity run time" {et-st}s')
-        st = time.time()
-        self.h_g_arr = self.calcBartz()
-        et = time.time()
-        print(f'calcBartz run time" {et-st}s')
-        st = time.time()
-        self.heat_flux_arr = self.calcHeatFlux()
-        et = time.time()
-        print(f'calcHeatFlux run time" {et-st}s')
-        st = time.time()
-        self.total_watts = self.totalWatts()
-        et = time.time()
-        print(f'totalWatts run time" {et-st}s')
+        with span('heatCalcs'):
+            with span('mach'):
+                self.mach_arr = self.solveMach()
+            with span('stations'):
+                self.stationCalcs()
+            with span('totalWatts'):
+                self.total_watts = self.totalWatts()
         '''
     def heatCalcsFilmCooling(self, area_arr, contour, wall_temp, fuel_delta_t, fuel, mr, filmCoolingPercent):
         self.area_arr = area_arr
@@ -231,7 +247,7 @@ class ThrustLevel:
 
     def calcThrust(self, pAmbient):#make dependant on altitude input
         self.thrust = (self.mdot * self.exit.mach * self.exit.son + (self.exit.p - pAmbient)*self.exit.a) * self.eta
-        print(f'eta: {self.eta}')
+        debug(f'eta: {self.eta}')
     '''
     def bartz(self, d_throat, p_chamber, c_star, d, c_p, visc, t_gas, t_wall):
         """bartz equation calculator"""
@@ -239,84 +255,48 @@ class ThrustLevel:
         return (0.026 / math.pow(d_throat, 0.2) * math.pow((p_chamber / c_star), 0.8) * math.pow((d_throat / d),
             1.8) * c_p * math.pow(visc, 0.2) * math.pow((t_gas / t_boundary), (0.8 - 0.2 * 0.6)))
     '''
-    def bartz2(self, d_throat, p_chamber, c_star, d, c_p, visc, t_gas, t_wall, gam, M, Pr):
-        # Pr = 4*gam/(9*gam-9)
-        if self.temp1 == 0:
-            print(f"d_throat = {d_throat}\np_chamber = {p_chamber}\nc_star = {c_star}\nd = {d}\nc_p = {c_p}\nvisc = {visc}\nt_gas = {t_gas}\nt_wall = {t_wall}\ngam = {gam}\nM = {M}\nPr = {Pr}\n")
-            self.temp1 += 1
-        t_boundary = (t_gas + t_wall) / 2
-        sig = 1/((0.5*(t_wall / t_gas)*(1+(gam-1)/2*M**2)+0.5)**(0.68)*(1+(gam-1)/2*M**2)**0.12)
-        return ((0.026/d_throat**0.2)*((c_p*visc**0.2)/(Pr**0.6))*((p_chamber/c_star)**0.8)*((d_throat / d)**1.8)*sig)
-
     def throatAreaEquation(self, mdot, press, temp, rbar, gam): 
         press *= 100000
         return (mdot / (press)) * math.sqrt(temp * rbar / gam) * math.pow(
                 (1 + ((gam - 1) / 2)), ((gam + 1) / (2 * (gam - 1))))
 
     def solveMach(self): # IMPORTANT NOTE: area ratio might be wrong, might need to be inversed
-        def solveMatchForAreaRatio(area_ratio, mach_guess=0.7):
-            def machEqn(mach):
-                # return mach * area_ratio + 10
-                return ( 2 / (self.thr.gam + 1) * ( 1 + (self.thr.gam - 1)/2 * mach**2 ))**((self.thr.gam+1)/(2*(self.thr.gam-1))) - mach * area_ratio
-            return fsolve(machEqn, mach_guess)
-        
-        mach_arr = []
-        last = 0.7
-        for [x, area] in self.area_arr.transpose():
-            if x > 0 and last <= 1: 
-                last = last + 1
-            [mach] = solveMatchForAreaRatio(area/self.thr.a, last)
-            mach_arr.append([x, mach])
-            last = mach
-        
-        mach_arr = np.array(mach_arr).transpose()
+        #all stations are solved at once from the cached table for this gamma, the branch is picked from the throat (smallest area) station
+        mach, self.mach_iterations, self.mach_converged = solveMachTable(self.area_arr[1,:]/self.thr.a, self.thr.gam)
+        if not self.mach_converged.all():
+            print(f'solveMach: {np.count_nonzero(~self.mach_converged)} stations did not converge')
+        mach_arr = np.array([self.area_arr[0,:], mach])
         return mach_arr
 
-    def temp_eq(self, mach):#NOTE: stagnation values need improvment
+    def stagnation(self):#NOTE: stagnation values need improvment
         #NOTE: check if gamma can be made into array along x axis
-        gam = self.thr.gam
-        t_stag = self.cham.t * (1 + ((gam-1)/2 * self.cham.mach**2))
         # Note: ok technically, yes, the stagnation temperature needs to account for
         # gas velocity, but in our assumptions, t_0 assumed == t_cham as given by CEA
-        #t_stag = self.inj.t
-
-        myreturn = t_stag * (1 + ((gam-1)/2 * mach**2))**(-1)
-        return myreturn
-
-    def pressure_eq(self, mach):
-        gam = self.thr.gam# CHECK THIS!!!
-        p_stag = self.cham.p * (1 + ((gam-1)/2 * self.cham.mach**2))**(gam/(gam-1))
-        #p_stag = self.inj.p
-        myreturn = p_stag * (1 + ((gam-1)/2 * mach**2))**(-gam/(gam-1))
-        return myreturn
+        return stagnationState(self.cham.t, self.cham.p, self.cham.rho, self.cham.mach, self.thr.gam)
 
-    def density_eq(self, mach):#need to find chamber density
-        gam = self.thr.gam# CHECK THIS!!!
-        d_stag = self.cham.rho * (1 + ((gam-1)/2 * self.cham.mach**2))**(1/(gam-1))
-        myreturn = d_stag * (1 + ((gam-1)/2 * mach**2))**(-1/(gam-1))
-        return myreturn
+    def stationCalcs(self):
+        #temperature, pressure, density, bartz sigma, h_g and heat flux for every station in one pass
+        t_stag, p_stag, rho_stag = self.stagnation()
+        x = self.mach_arr[0,:]
+        temp, pressure, density, sigma, h_g, heat_flux = stationKernel(self.mach_arr[1,:], self.contour[1,:]*2, self.thr.gam, t_stag, p_stag, rho_stag,
+            self.thr.d, self.cham.p*100000, self.Cstar, self.cham.cp*1000, 0.85452e-4, self.cham.pr, self.wall_temp) #add viscosity to this
+        self.temp_arr = np.array([x, temp])
+        self.pressure_arr = np.array([x, pressure])
+        self.density_arr = np.array([x, density])
+        self.sigma_arr = np.array([x, sigma])
+        self.h_g_arr = np.array([x, h_g])
+        self.heat_flux_arr = np.array([x, heat_flux])
 
     def tempPressureDensity(self):
-        pressure_arr = self.mach_arr.copy()
-        temp_arr = self.mach_arr.copy()
-        #self.density_arr = self.mach_arr.copy()
-        count = 0
-        #print(self.mach_arr)
-        for mach in self.mach_arr[1,:]:
-            temp_arr[1,count] = self.temp_eq(mach)
-            pressure_arr[1,count] = self.pressure_eq(mach)
-            #self.density_arr[1,count] = self.density_eq(mach)
-            count += 1
-        return temp_arr ,pressure_arr #density_arr
+        t_stag, p_stag, rho_stag = self.stagnation()
+        temp, pressure, density = isentropicStations(self.mach_arr[1,:], self.thr.gam, t_stag, p_stag, rho_stag)
+        self.density_arr = np.array([self.mach_arr[0,:], density])
+        return np.array([self.mach_arr[0,:], temp]), np.array([self.mach_arr[0,:], pressure])
 
     def calcBartz(self):
-        h_g_arr = self.contour.copy()
-        print('thr diameter:{}\nchamber pressure:{}\nc star:{}\nchamber cp:{}\nwall temp:{}\ngam:{}\nmach:{}'.format(self.thr.d, self.cham.p, self.Cstar, self.cham.cp, self.wall_temp, self.thr.gam, self.mach_arr[1,1]))
-        for i in range(len(h_g_arr[0])):
-            #print('thr diameter:{}\nchamber pressure:{}\nc star:{}\ncontour:{}\nchamber cp:{}\ntemperature array:{}\nwall temp{}'.format(self.thr.d, self.cham.p, self.Cstar, self.contour, self.cham.cp, self.temp_arr, self.wall_temp))
-            #h_g_arr[1,i] = self.bartz(self.thr.d, self.cham.p*100000, self.Cstar, self.contour[1,i]*2, self.cham.cp*1000, 0.85452e-4, self.temp_arr[1,i], self.wall_temp) #add viscosity to this
-            h_g_arr[1,i] = self.bartz2(self.thr.d, self.cham.p*100000, self.Cstar, self.contour[1,i]*2, self.cham.cp*1000, 0.85452e-4, self.temp_arr[1,i], self.wall_temp, self.thr.gam, self.mach_arr[1,i], self.cham.pr) #add viscosity to this
-        return h_g_arr
+        sigma = bartzSigma(self.temp_arr[1,:], self.wall_temp, self.thr.gam, self.mach_arr[1,:])
+        h_g = bartz(self.thr.d, self.cham.p*100000, self.Cstar, self.contour[1,:]*2, self.cham.cp*1000, 0.85452e-4, self.cham.pr, sigma) #add viscosity to this
+        return np.array([self.contour[0,:], h_g])
     
     '''
     def runRCC(self):
@@ -369,25 +349,27 @@ class ThrustLevel:
     '''
 
     def calcHeatFlux(self):
-        heat_flux_arr = self.h_g_arr.copy()
-        for i in range(len(heat_flux_arr[0])):
-            heat_flux_arr[1,i] = self.h_g_arr[1,i]*(self.temp_arr[1,i]-self.wall_temp)
-        return heat_flux_arr
+        return np.array([self.h_g_arr[0,:], heatFlux(self.h_g_arr[1,:], self.temp_arr[1,:], self.wall_temp)])
 
     def totalWatts(self):
-        total_watts = 0
-        for i in range(len(self.heat_flux_arr[0])-1):
-            total_watts = total_watts + math.sqrt((self.contour[0,i] - self.contour[0,i+1])**2+(self.contour[1,i] - self.contour[1,i+1])**2)*2*math.pi* self.contour[1,i]* self.heat_flux_arr[1,i]
+        #also keeps the cumulative [x, watts] heat load and the per region watts for coolant sizing
+        total_watts, self.heat_load_arr, self.region_watts = self.heatLoad.integrate(self.heat_flux_arr[1,:])
         return total_watts
     
     def fuelWatts(self):
         #print(f'fuel cp: {self.fuel.cp} \nfuel delta t: {self.fuel_delta_t}\nmdot: {self.mdot}\nmr: {self.mr}\nfilm cooling percent: {self.filmCoolingPercent}')
-        return (self.fuel.cp * self.fuel_delta_t * (self.mdot/(self.mr+1) * (1+self.filmCoolingPercent)))
+        #the heat the fuel takes up warming by fuel_delta_t, from the coolant registry when the fuel has a cp there
+        coolant = getattr(self.fuel, 'coolant', None)
+        heat = coolant.enthalpyRise(self.fuel.T_inlet, self.fuel_delta_t) if coolant is not None else np.nan
+        if not np.isfinite(heat):
+            heat = self.fuel.cp * self.fuel_delta_t
+        return (heat * (self.mdot/(self.mr+1) * (1+self.filmCoolingPercent)))
 
     def graphDisplay(self, pressure_units = 'bar', distance_units = 'in'):
         if self.contour is None:
             print('no contour to generate graphs')
             return
+        import matplotlib.pyplot as plt # only loaded when graphs are made
         #temperature units?
         if(pressure_units == 'bar'):
             Pcon = 1 #bar
@@ -445,4 +427,59 @@ class ThrustLevel:
         axs2[1].legend(loc=(0,1))
         sax.legend(loc=(0.75,1))
         
-        plt.show()
\ No newline at end of file
+        plt.show()
+
+def batchHeatCalcs(levels, area_arr, contour, wall_temp, mr, heatLoad = None):
+    '''
+    heatCalcs for every ThrustLevel in levels at once, they all share the contour
+    the gamma, stagnation state, Cstar and throat size of every level are stacked into columns so mach, the station
+    states and bartz come out of one (level x station) pass, the contour terms (diameter, throat position, wetted area)
+    are worked out once. every level gets the same arrays and values heatCalcs gives it
+    returns the StationProfiles block of every level, each level's profiles are a view into it
+    '''
+    if heatLoad is None:
+        heatLoad = HeatLoadIntegrator(contour)
+    column = lambda values: np.array(values, dtype=float)[:, None]
+    gam = column([level.thr.gam for level in levels])
+    x = area_arr[0,:]
+    with span('heatCalcs'):
+        with span('mach'):
+            # mach only depends on gamma and the throat area, levels that share both share a row and the other rows
+            # start from the row solved before them, throttle levels are close enough that this takes one or two steps
+            # (rounded values only group the levels, every row is solved with the exact values of its first level)
+            exact = np.column_stack((gam[:,0], [level.thr.a for level in levels]))
+            rows, first, inverse = np.unique(np.round(exact, 12), axis=0, return_index=True, return_inverse=True)
+            supersonic = np.arange(area_arr.shape[1]) > np.argmin(area_arr[1,:]) # same throat station for every level
+            mach = np.empty((len(rows), area_arr.shape[1]))
+            iterations = np.empty(mach.shape, dtype=np.int32)
+            converged = np.empty(mach.shape, dtype=bool)
+            for j, (g, a) in enumerate(exact[first]):
+                guess = getMachTable(g).lookup(area_arr[1,:] / a, supersonic) if j == 0 else mach[j - 1]
+                mach[j], iterations[j], converged[j] = solveMachArray(area_arr[1,:] / a, g, supersonic = supersonic, mach_guess = guess)
+            inverse = np.ravel(inverse)
+            mach, iterations, converged = mach[inverse], iterations[inverse], converged[inverse]
+            if not converged.all():
+                print(f'solveMach: {np.count_nonzero(~converged)} stations did not converge')
+        with span('stations'):
+            t_stag, p_stag, rho_stag = stagnationState(column([level.cham.t for level in levels]), column([level.cham.p for level in levels]),
+                column([level.cham.rho for level in levels]), column([level.cham.mach for level in levels]), gam)
+            temp, pressure, density, sigma, h_g, heat_flux = stationKernel(mach, contour[1,:]*2, gam, t_stag, p_stag, rho_stag,
+                column([level.thr.d for level in levels]), column([level.cham.p*100000 for level in levels]), column([level.Cstar for level in levels]),
+                column([level.cham.cp*1000 for level in levels]), 0.85452e-4, column([level.cham.pr for level in levels]), wall_temp) #add viscosity to this
+        with span('totalWatts'):
+            cumulative = heatLoad.cumulativeWatts(heat_flux)
+            region_watts = heatLoad.regionWatts(cumulative)
+    profiles = StationProfiles(x, len(levels), dtype = levels[0].profileDtype)
+    for name, values in (('mach', mach), ('temp', temp), ('pressure', pressure), ('density', density), ('sigma', sigma), ('h_g', h_g), ('heat_flux', heat_flux), ('heat_load', cumulative)):
+        profiles.set(name, values)
+    for i, level in enumerate(levels):
+        level.profiles = profiles.level(i)
+        level.area_arr = area_arr
+        level.contour = contour
+        level.heatLoad = heatLoad
+        level.wall_temp = wall_temp
+        level.mr = mr
+        level.mach_iterations, level.mach_converged = iterations[i], converged[i]
+        level.region_watts = {name: watts[i] for name, watts in region_watts.items()}
+        level.total_watts = cumulative[i, -1]
+    return profiles
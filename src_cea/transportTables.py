@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+import numpy as np
+from .runCEA import RunCEA
+from .ceaTable import propellantKey
+'''
+combustion gas properties against temperature for the cooling solver
+one table is built per propellant, mixture ratio and chamber pressure from a single sweep of CEA runs along the nozzle
+expansion (the chamber, the throat and the exit of every area ratio in a geometric series), so it spans the chamber
+temperature down to the exit temperature of the largest area ratio. lookups interpolate linearly in temperature and work
+on whole arrays, temperatures outside the table get its end values.
+the pressure falls with the temperature along the expansion, so a property at T is the one of the expanded gas and not of
+a tp run at the chamber pressure, the difference is small next to the uncertainty of bartz's correlation
+units: t in K, cp in J/kgK, mu in Pa s
+    table = getTransportTable(cea, Pc = 30, Mr = 2.2)
+    cp = table.interpolate('cp', Taw)
+'''
+
+transportProperties = ('cp', 'gam', 'mu', 'pr')
+maxTables = 32 #number of tables kept in memory, least recently used tables are dropped first
+_tables = OrderedDict()
+
+class TransportTable:
+    def __init__(self, t, values):
+        #t ascending, values is a dict of transportProperties -> arrays matching t
+        self.t = np.asarray(t, dtype=float)
+        self.values = {name: np.asarray(values[name], dtype=float) for name in transportProperties}
+
+    @staticmethod
+    def build(cea, Pc, Mr, frozen = 1, epsMax = 100.0, points = 48, backend = RunCEA):
+        '''
+        Pc in bar, backend is anything with RunCEA's create (RunCEA, CEATable, IdealGasBackend)
+        frozen = 1 gives the frozen reaction cp the cooling solver was written against
+        '''
+        stations = []
+        for i, eps in enumerate(np.geomspace(1.05, epsMax, points)):
+            chems = backend.create(cea, Pc, Mr, ae = eps, frozen = frozen)
+            stations.extend(chems[-3:] if i == 0 else chems[-1:]) # the chamber and throat are the same in every run
+        t, index = np.unique([chem.t for chem in stations], return_index=True)
+        stations = [stations[i] for i in index]
+        values = {'cp': [chem.cp * 1000 for chem in stations], 'gam': [chem.gam for chem in stations],
+            'mu': [chem.mu * 1e-4 for chem in stations], 'pr': [chem.pr for chem in stations]}
+        return TransportTable(t, values)
+
+    def interpolate(self, name, t):
+        return np.interp(t, self.t, self.values[name])
+
+    def lookup(self, t):
+        #every property at the temperatures t
+        return {name: self.interpolate(name, t) for name in transportProperties}
+
+    def save(self, path):
+        #written to a temp file first so other processes never see a half written table
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, t=self.t, **self.values)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            return TransportTable(data['t'], {name: data[name] for name in transportProperties})
+
+    def __repr__(self):
+        return f'TransportTable(t={self.t[0]:.1f}..{self.t[-1]:.1f} K, points={len(self.t)})'
+
+def tableKey(cea, Pc, Mr, frozen, epsMax, points):
+    case = [propellantKey(cea) if cea is not None else None, float(Pc), float(Mr), int(frozen), float(epsMax), int(points)]
+    return hashlib.sha256(json.dumps(case).encode()).hexdigest()
+
+def getTransportTable(cea, Pc, Mr, frozen = 1, epsMax = 100.0, points = 48, backend = RunCEA, cacheDir = None):
+    '''
+    returns the table for the propellants of cea at Pc (bar) and Mr, building it only if it is not in memory or in cacheDir
+    cacheDir is optional, when given RunCEA tables are loaded from and saved to that folder
+    '''
+    key = (backend, tableKey(cea, Pc, Mr, frozen, epsMax, points))
+    if key in _tables:
+        _tables.move_to_end(key)
+        return _tables[key]
+    table = None
+    path = None
+    if cacheDir is not None and backend is RunCEA: # other backends have no fingerprint of their gas in the key
+        path = os.path.join(cacheDir, f'transportTable_{key[1]}.npz')
+        if os.path.isfile(path):
+            try:
+                table = TransportTable.load(path)
+            except (OSError, KeyError, ValueError):
+                table = None
+    if table is None:
+        table = TransportTable.build(cea, Pc, Mr, frozen, epsMax, points, backend)
+        if path is not None:
+            os.makedirs(cacheDir, exist_ok=True)
+            table.save(path)
+    _tables[key] = table
+    while len(_tables) > maxTables:
+        _tables.popitem(last=False)
+    return table
+
+def clearTransportTables():
+    _tables.clear()
@@ -0,0 +1,47 @@
+import os
+import sys
+import math
+import importlib
+import numpy as np
+'''
+batchHeatCalcs against ThrustLevel.heatCalcs run level by level, run with python tests/batchHeatCalcs_test.py (or pytest)
+the engine runs on IdealGasBackend so neither rocketcea nor a CEA_Obj is needed
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(repoRoot))
+engine = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.engine')
+idealGasBackend = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.idealGasBackend')
+
+def throttledEngine(nozzle_type):
+    backend = idealGasBackend.IdealGasBackend(gam = 1.22, MW = 21.5, Tc = 3400.0)
+    return engine.Engine('batch heat', 'RP1', 'LOX', nozzle_type, 1.8, 39, 1.48, 1.02, 3.375 * 0.0254, 473, 1, 1, 0.4, math.pi / 4, 100,
+        pMinExitRatio = [0.6, 0.4], div_angle = math.pi / 12, contourStep = 1e-3, backend = backend, lazy = True)
+
+def checkLevels(eng):
+    levels = eng.heatTransfer # batched pass
+    assert len(levels) == 3
+    batch = eng.profiles.data.copy()
+    totals = [level.total_watts for level in levels]
+    regions = [dict(level.region_watts) for level in levels]
+    for i, level in enumerate(levels):
+        level.heatCalcs(eng.area_arr, eng.contour, eng.wall_temp, eng.Mr, eng.heatLoad)
+        assert level.mach_converged.all()
+        single = level.profiles.data.reshape(batch[i].shape)
+        assert np.array_equal(single[0], batch[i][0]) # same x
+        assert np.max(np.abs(single - batch[i]) / np.maximum(np.abs(batch[i]), 1e-300)) < 1e-12
+        assert abs(level.total_watts - totals[i]) <= 1e-12 * abs(totals[i])
+        assert regions[i].keys() == level.region_watts.keys()
+        for name, watts in regions[i].items():
+            assert abs(level.region_watts[name] - watts) <= 1e-12 * abs(watts)
+
+def test_conical():
+    checkLevels(throttledEngine('conical'))
+
+def test_bell80():
+    checkLevels(throttledEngine('bell80'))
+
+if __name__ == '__main__':
+    test_conical()
+    test_bell80()
+    print('batch heat calcs tests passed')
@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import math
+import time
+import platform
+import argparse
+import importlib
+import subprocess
+'''
+benchmark suite, results are written to json with the environment they were measured in so runs can be compared over time
+    micro   nozzleGeneration, solveMach, calcBartz, totalWatts at several contourStep values, RunCEA.create and
+            Chemistry.parse_initVeriables
+    engine  full Engine runs of the RCV_CEA_examples configurations
+    sweep   EngineAnalyzer style sweep throughput at several worker counts
+    imports cold import time of the src_cea modules in a fresh interpreter (python -X importtime) and which heavy
+            libraries each import pulled in, plotting/dataframe libraries and rocketcea should only load when used
+run from anywhere with
+    python tests/benchmarks.py --suite all --out bench.json
+the repo is imported as a package by its folder name, the same way the example scripts import it.
+without rocketcea (or with --backend ideal) the engine, sweep and micro engine stages run on IdealGasBackend, the
+report records which backend was used. parts that can only run on CEA are skipped (and listed under "skipped"), a
+sweep whose cases all fail is skipped with the first error instead of reporting a throughput
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+repoName = os.path.basename(repoRoot)
+sys.path.insert(0, os.path.dirname(repoRoot))
+
+def repoModule(name):
+    return importlib.import_module(f'{repoName}.{name}')
+
+customFuel = [
+    "Isopropanol70",
+    """fuel C3H8O-2propanol C 3 H 8 O 1    wt%=70.0
+h,cal=-65133.0     t(k)=298.15   rho=0.786
+fuel water H 2.0 O 1.0  wt%=30.0
+h,cal=-68308.0  t(k)=298.15 rho,g/cc = 0.9998"""
+]
+
+# the engines in RCV_CEA_examples/main_rocketcea.py
+exampleEngines = {
+    'APRL Engine mu2 Sizing': dict(title = 'APRL Engine mu2 Sizing', fuel = 'RP1', ox = 'LOX', nozzle_type = 'conical', Mr = 1.8, pMaxCham = 39, mdotMax = 1.48, Lstar = 1.02,
+        Dcham = 3.375 * 0.0254, wall_temp = 473, r1 = 1, r2 = 1, r3 = 0.4, conv_angle = math.pi / 4, fuel_delta_t = 100, pMinExitRatio = [], filmCoolingPercent = 0.0,
+        div_angle = math.pi / 12, contourStep = 1e-2, customFuel = customFuel, frozen = 1, pAmbient = 1.01325, doContours = True, eta = 0.9),
+    'temp engine': dict(title = 'temp engine', fuel = 'RP1', ox = 'LOX', nozzle_type = 'conical', Mr = 1.8, pMaxCham = 50, mdotMax = 0.4, Lstar = 1.02,
+        Dcham = 2.5 * 0.0254, wall_temp = 650, r1 = 1, r2 = 1, r3 = 0.4, conv_angle = math.pi / 4, fuel_delta_t = 200, pMinExitRatio = [], filmCoolingPercent = 0.2,
+        div_angle = math.pi / 12, contourStep = 1e-3, customFuel = customFuel, frozen = 0, pAmbient = 1.01325, doContours = True, eta = 0.9),
+}
+
+def environment():
+    info = {'python': platform.python_version(), 'implementation': platform.python_implementation(), 'platform': platform.platform(),
+        'machine': platform.machine(), 'processor': platform.processor(), 'cpuCount': os.cpu_count(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    for name in ['numpy', 'scipy', 'pandas', 'rocketcea']:
+        try:
+            info[name] = getattr(importlib.import_module(name), '__version__', 'unknown')
+        except ImportError:
+            info[name] = None
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repoRoot, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        info['commit'] = None
+    return info
+
+def timeCall(fun, repeat):
+    #best and mean wall time of repeat calls in seconds
+    times = []
+    for i in range(repeat):
+        st = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - st)
+    return {'best': min(times), 'mean': sum(times) / len(times), 'repeat': repeat}
+
+backend = None # set by main, None runs RunCEA (rocketcea)
+
+def idealGasBackend():
+    #stands in for CEA when rocketcea is not installed, so the non CEA stages can still be timed
+    return repoModule('src_cea.idealGasBackend').IdealGasBackend(gam = 1.2, MW = 22.0, Tc = 3300.0)
+
+def pickBackend(name):
+    #returns (backend, label), 'auto' uses CEA when rocketcea imports
+    if name == 'auto':
+        try:
+            importlib.import_module('rocketcea.cea_obj')
+            name = 'cea'
+        except ImportError:
+            name = 'ideal'
+    return (None, 'cea') if name == 'cea' else (idealGasBackend(), 'ideal')
+
+def buildEngine(config, **changes):
+    Engine = repoModule('src_cea.engine').Engine
+    return Engine(**dict(config, backend = backend, **changes))
+
+def microSuite(steps, repeat, skipped):
+    results = {}
+    Chemistry = repoModule('src.chemistry').Chemistry
+    ceaData = os.path.join(repoRoot, 'RCV_examples', 'cea_data')
+    for name in sorted(os.listdir(ceaData)):
+        path = os.path.join(ceaData, name)
+        try:
+            Chemistry.parse_initVeriables(path)
+        except Exception:
+            continue # not a cea output table
+        results[f'parse_initVeriables[{name}]'] = timeCall(lambda: Chemistry.parse_initVeriables(path), repeat)
+    try:
+        engine = buildEngine(exampleEngines['APRL Engine mu2 Sizing'], doContours = False)
+    except ImportError as e:
+        skipped['micro engine stages'] = str(e)
+        return results
+    HeatLoadIntegrator = repoModule('src_cea.heatLoad').HeatLoadIntegrator
+    thr = engine.max
+    for step in steps:
+        engine.contourStep = step
+        results[f'nozzleGeneration[{step:g}]'] = timeCall(engine.nozzleGeneration, repeat)
+        engine.contourPoints, engine.contour = engine.nozzleGeneration()
+        engine.area_arr = engine.areas()
+        heatLoad = HeatLoadIntegrator(engine.contour, engine.geometry.joints)
+        thr.heatCalcs(engine.area_arr, engine.contour, engine.wall_temp, engine.Mr, heatLoad)
+        results[f'solveMach[{step:g}]'] = timeCall(thr.solveMach, repeat)
+        results[f'calcBartz[{step:g}]'] = timeCall(thr.calcBartz, repeat)
+        results[f'totalWatts[{step:g}]'] = timeCall(thr.totalWatts, repeat)
+        results[f'stations[{step:g}]'] = engine.contour.shape[1]
+    if backend is not None:
+        skipped['micro RunCEA.create'] = 'needs rocketcea, ran on IdealGasBackend'
+        return results
+    RunCEA = repoModule('src_cea.runCEA').RunCEA
+    cache = RunCEA.cache
+    RunCEA.cache = None
+    results['RunCEA.create'] = timeCall(lambda: RunCEA.create(engine.cea, engine.pMaxCham, engine.Mr, pAmbient = engine.pAmbient, frozen = engine.frozen), repeat)
+    RunCEA.cache = cache
+    if cache is not None:
+        RunCEA.create(engine.cea, engine.pMaxCham, engine.Mr, pAmbient = engine.pAmbient, frozen = engine.frozen)
+        results['RunCEA.create cached'] = timeCall(lambda: RunCEA.create(engine.cea, engine.pMaxCham, engine.Mr, pAmbient = engine.pAmbient, frozen = engine.frozen), repeat)
+    return results
+
+def engineSuite(repeat, skipped):
+    results = {}
+    for name, config in exampleEngines.items():
+        try:
+            results[name] = timeCall(lambda: buildEngine(config), repeat)
+        except ImportError as e:
+            skipped[f'engine {name}'] = str(e)
+    return results
+
+def sweepCases(size):
+    #the RCV_CEA_examples/main_engine_analyzer.py sweep with size values per swept variable
+    base = dict(exampleEngines['APRL Engine mu2 Sizing'], doContours = False, backend = backend)
+    cases = []
+    for i in range(size):
+        for j in range(size):
+            for k in range(size):
+                cases.append(dict(base, pMaxCham = 30 + 20 * i / max(size - 1, 1), Mr = 1.6 + 0.6 * j / max(size - 1, 1), mdotMax = 1.2 + 0.6 * k / max(size - 1, 1)))
+    return cases
+
+def sweepSuite(workers, size, skipped):
+    results = {}
+    try:
+        repoModule('src_cea.engine')
+    except ImportError as e:
+        skipped['sweep'] = str(e)
+        return results
+    runCases = repoModule('src_cea.sweepRunner').runCases
+    RunCEA = repoModule('src_cea.runCEA').RunCEA
+    cases = sweepCases(size)
+    for count in workers:
+        if RunCEA.cache is not None:
+            RunCEA.cache.clear() # every worker count starts cold
+        st = time.perf_counter()
+        out = runCases(cases, count)
+        wall = time.perf_counter() - st
+        ok = sum(r['ok'] for r in out)
+        if ok == 0: # nothing was measured, e.g. every case needed a library that is missing
+            skipped[f'sweep workers={count}'] = next(r['error'] for r in out)
+            continue
+        results[f'workers={count}'] = {'cases': len(cases), 'failed': len(cases) - ok, 'wall': wall, 'casesPerSecond': ok / wall}
+    return results
+
+importModules = ['src_cea.engine', 'src_cea.engineAnalyzer', 'src_cea.sweepRunner', 'src_cea.thrustLevel']
+heavyModules = ['matplotlib', 'pandas', 'plotly', 'scipy', 'rocketcea', 'rocketprops']
+
+def importTime(module, top = 10):
+    #imports module in a new interpreter, returns its wall time, the slowest imports and the heavy libraries loaded
+    code = f'import sys, time; st = time.perf_counter(); import {repoName}.{module}; wall = time.perf_counter() - st; ' \
+        f'print(wall); print(",".join(m for m in {heavyModules!r} if m in sys.modules))'
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=os.path.dirname(repoRoot), capture_output=True, text=True)
+    if out.returncode != 0:
+        raise ImportError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f'import {module} failed')
+    wall, heavy = out.stdout.splitlines()[-2:]
+    imports = []
+    for line in out.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            fields = line[len('import time:'):].split('|')
+            try:
+                imports.append((int(fields[1]), fields[2].strip()))
+            except ValueError:
+                continue # the header line
+    imports.sort(reverse = True)
+    return {'wall': float(wall), 'heavy': heavy.split(',') if heavy else [], 'top': [{'module': name, 'cumulativeUs': us} for us, name in imports[:top]]}
+
+def importSuite(repeat, skipped):
+    results = {}
+    for module in importModules:
+        try:
+            runs = [importTime(module) for i in range(repeat)]
+        except ImportError as e:
+            skipped[f'import {module}'] = str(e)
+            continue
+        walls = [run['wall'] for run in runs]
+        results[module] = {'best': min(walls), 'mean': sum(walls) / len(walls), 'repeat': repeat, 'heavy': runs[-1]['heavy'], 'top': runs[-1]['top']}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description = 'RocketConfigurationVisualizer benchmarks')
+    parser.add_argument('--suite', choices = ['micro', 'engine', 'sweep', 'imports', 'all'], default = 'all')
+    parser.add_argument('--steps', type = float, nargs = '+', default = [1e-2, 1e-3, 1e-4], help = 'contourStep values for the micro suite')
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--workers', type = int, nargs = '+', default = sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument('--sweepSize', type = int, default = 4, help = 'values per swept variable, the sweep has sweepSize^3 cases')
+    parser.add_argument('--backend', choices = ['auto', 'cea', 'ideal'], default = 'auto', help = 'auto uses IdealGasBackend when rocketcea is missing')
+    parser.add_argument('--out', default = 'benchmarks.json')
+    args = parser.parse_args()
+    global backend
+    backend, backendName = pickBackend(args.backend)
+    skipped = {}
+    report = {'environment': environment(), 'args': vars(args), 'backend': backendName, 'results': {}, 'skipped': skipped}
+    if args.suite in ('micro', 'all'):
+        report['results']['micro'] = microSuite(args.steps, args.repeat, skipped)
+    if args.suite in ('engine', 'all'):
+        report['results']['engine'] = engineSuite(args.repeat, skipped)
+    if args.suite in ('sweep', 'all'):
+        report['results']['sweep'] = sweepSuite(args.workers, args.sweepSize, skipped)
+    if args.suite in ('imports', 'all'):
+        report['results']['imports'] = importSuite(args.repeat, skipped)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent = 2)
+    for suite, results in report['results'].items():
+        for name, result in results.items():
+            value = result['best'] if isinstance(result, dict) and 'best' in result else result
+            print(f'{suite:<8}{name:<48}{value}')
+    for name, reason in skipped.items():
+        print(f'skipped {name}: {reason}')
+    print(f'results written to {args.out}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import importlib
+'''
+CEACache keys and store, run with python tests/ceaCache_test.py (or pytest)
+keys are checked on a propellant object that carries its own cea_deck, so rocketcea is only needed for the add_new_fuel
+test, which is left out when rocketcea is not installed
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(repoRoot))
+ceaCache = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.ceaCache')
+ceaTable = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.ceaTable')
+transportTables = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.transportTables')
+
+fuelCard = ['fuel C2H5OH(L) C 2 H 6 O 1 wt%={:.1f}', 'h,cal=-66370.0 t(k)=298.15', 'fuel H2O(L) H 2 O 1 wt%={:.1f}', 'h,cal=-68308.0 t(k)=298.15']
+
+class Propellants:
+    #the attributes of a CEA_Obj the keys read, cea_deck holds the cards CEA is run with
+    def __init__(self, ethanol, fuelName = 'Ethanol75', oxName = 'LOX', fac_CR = None):
+        self.propName = ''
+        self.fuelName = fuelName
+        self.oxName = oxName
+        self.fac_CR = fac_CR
+        self.cea_deck = [line.format(ethanol if 'C2H5OH' in line else 100 - ethanol) for line in fuelCard]
+
+def test_redefinedFuel():
+    #the same fuel name with other cards gives new keys, so results of the old definition are never served
+    before, after = Propellants(75), Propellants(70)
+    assert ceaCache.caseKey(before, 30, 1.3, 8) == ceaCache.caseKey(Propellants(75), 30, 1.3, 8)
+    assert ceaCache.caseKey(before, 30, 1.3, 8) != ceaCache.caseKey(after, 30, 1.3, 8)
+    assert ceaTable.propellantKey(before) != ceaTable.propellantKey(after)
+    assert transportTables.tableKey(before, 30, 1.3, 1, 100.0, 48) != transportTables.tableKey(after, 30, 1.3, 1, 100.0, 48)
+    cache = ceaCache.CEACache()
+    cache.put(ceaCache.caseKey(before, 30, 1.3, 8), [{'p': 30.0}])
+    assert cache.get(ceaCache.caseKey(after, 30, 1.3, 8)) is None
+    assert cache.get(ceaCache.caseKey(before, 30, 1.3, 8)) == [{'p': 30.0}]
+
+def test_caseKeyArguments():
+    #every run argument is part of the key, numbers are compared as floats
+    propellants = Propellants(75)
+    key = ceaCache.caseKey(propellants, 30, 1.3, 8)
+    assert key == ceaCache.caseKey(propellants, 30.0, 1.3, 8.0)
+    others = [ceaCache.caseKey(propellants, 31, 1.3, 8), ceaCache.caseKey(propellants, 30, 1.4, 8), ceaCache.caseKey(propellants, 30, 1.3, 9),
+        ceaCache.caseKey(propellants, 30, 1.3, PcOvPe = 8), ceaCache.caseKey(propellants, 30, 1.3, 8, frozen = 1),
+        ceaCache.caseKey(propellants, 30, 1.3, 8, frozen = 1, frozenAtThroat = 1), ceaCache.caseKey(Propellants(75, oxName = 'GOX'), 30, 1.3, 8),
+        ceaCache.caseKey(Propellants(75, fac_CR = 2.5), 30, 1.3, 8)]
+    assert len(set(others + [key])) == len(others) + 1
+
+def test_store():
+    with tempfile.TemporaryDirectory() as folder:
+        cache = ceaCache.CEACache(maxSize = 2, cacheDir = folder)
+        keys = [ceaCache.caseKey(Propellants(75), Pc, 1.3, 8) for Pc in (10, 20, 30)]
+        for i, key in enumerate(keys):
+            cache.put(key, [{'p': float(i)}])
+        assert keys[0] not in cache._cases and len(cache._cases) == 2 # least recently used dropped from memory
+        assert cache.get(keys[0]) == [{'p': 0.0}] and cache.diskHits == 1 # but still on disk
+        shared = ceaCache.CEACache(cacheDir = folder) # another process on the same folder
+        assert shared.get(keys[2]) == [{'p': 2.0}] and shared.diskHits == 1
+        cache.clear(disk = True)
+        assert cache.get(keys[1]) is None and cache.stats()['misses'] == 1
+
+def test_addNewFuel():
+    #a CEA_Obj has no cea_deck, the key reads rocketcea's card dictionaries at the time it is made
+    try:
+        from rocketcea.cea_obj import CEA_Obj, add_new_fuel
+    except ImportError:
+        return
+    cards = lambda ethanol: '\n'.join(Propellants(ethanol).cea_deck)
+    add_new_fuel('ceaCacheTestFuel', cards(75))
+    cea = CEA_Obj(oxName = 'LOX', fuelName = 'ceaCacheTestFuel')
+    before = ceaCache.caseKey(cea, 30, 1.3, 8)
+    add_new_fuel('ceaCacheTestFuel', cards(70))
+    assert ceaCache.caseKey(cea, 30, 1.3, 8) != before
+
+if __name__ == '__main__':
+    test_redefinedFuel()
+    test_caseKeyArguments()
+    test_store()
+    test_addNewFuel()
+    print('cea cache tests passed')
@@ -0,0 +1,43 @@
+import os
+import sys
+import importlib
+import numpy as np
+'''
+colebrook friction factor of the cooling solver (mylibrcc), run with python tests/colebrook_test.py (or pytest)
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(repoRoot))
+mylibrcc = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.mylibrcc')
+
+def grid(ReMin = 2e3):
+    #Re from ReMin to 1e7 against e/D from 0 (smooth) to 0.05
+    return np.meshgrid(np.geomspace(ReMin, 1e7, 60), np.concatenate(([0.0], np.geomspace(1e-6, 0.05, 30))))
+
+def residual(f, Re, eD):
+    x = 1 / np.sqrt(f)
+    return x + 2 * np.log10(eD / 3.7 + 2.51 * x / Re)
+
+def test_swameeJainSeed():
+    #the explicit seed is within a few percent of the colebrook root, so newton only needs a few steps
+    for ReMin, tol in ((2e3, 0.05), (1e4, 0.025)):
+        Re, eD = grid(ReMin)
+        f = mylibrcc.colebrook_friction(Re, eD)
+        seed = mylibrcc.swamee_jain_friction(Re, eD)
+        assert np.max(np.abs(seed - f) / f) < tol
+
+def test_colebrookResidual():
+    Re, eD = grid()
+    f = mylibrcc.colebrook_friction(Re, eD)
+    assert np.all(np.isfinite(f)) and np.max(np.abs(residual(f, Re, eD))) < 1e-12
+
+def test_colebrookFewIterations():
+    Re, eD = grid()
+    f = mylibrcc.colebrook_friction(Re, eD, max_iterations=4)
+    assert np.max(np.abs(residual(f, Re, eD))) < 1e-12
+
+if __name__ == '__main__':
+    test_swameeJainSeed()
+    test_colebrookResidual()
+    test_colebrookFewIterations()
+    print('colebrook tests passed')
@@ -0,0 +1,68 @@
+import os
+import sys
+import math
+import importlib
+import numpy as np
+'''
+analytic ContourGeometry against finely sampled contours, run with python tests/contourGeometry_test.py (or pytest)
+the engines run on IdealGasBackend so neither rocketcea nor a CEA_Obj is needed
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(repoRoot))
+engine = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.engine')
+idealGasBackend = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.idealGasBackend')
+
+def geometry(nozzle_type):
+    backend = idealGasBackend.IdealGasBackend(gam = 1.22, MW = 21.5, Tc = 3400.0)
+    eng = engine.Engine('contour', 'RP1', 'LOX', nozzle_type, 1.8, 39, 1.48, 1.02, 3.375 * 0.0254, 473, 1, 1, 0.4, math.pi / 4, 100,
+        div_angle = math.pi / 12, contourStep = 1e-3, backend = backend)
+    return eng.geometry
+
+def segmentSamples(g, i, num = 20001):
+    #points along segment i, the wall length and wall area of the chords between them measured from the segment start
+    x, y = g.segmentSampler(i)(np.linspace(0, 1, num))
+    ds = np.hypot(np.diff(x), np.diff(y))
+    s = np.concatenate(([0.0], np.cumsum(ds)))
+    A = np.concatenate(([0.0], np.cumsum(np.pi * (y[1:] + y[:-1]) * ds)))
+    return x, y, s, A
+
+def checkGeometry(g):
+    for i in range(6):
+        x, y, s, A = segmentSamples(g, i)
+        inner = slice(1, -1) # the end points sit on joints, which belong to the segment before
+        assert np.max(np.abs(g.radius(x[inner]) - y[inner])) < 1e-12
+        assert abs(g.lengths[i] - s[-1]) < 1e-8 * g.length
+        assert np.max(np.abs(g.segmentArcLength(i, x) - s)) < 1e-8 * g.length
+        assert np.max(np.abs(g.segmentWallArea(i, x) - A)) < 1e-8 * g.cumulativeWallAreas[-1]
+        # cumulative values pick up where the segment before stopped
+        assert np.max(np.abs(g.arcLength(x[inner]) - g.cumulativeLengths[i] - s[inner])) < 1e-8 * g.length
+        assert np.max(np.abs(g.wallArea(x[inner]) - g.cumulativeWallAreas[i] - A[inner])) < 1e-8 * g.cumulativeWallAreas[-1]
+        # slope against central differences of the radius, away from the joints
+        xm = (x[1:] + x[:-1]) / 2
+        xm = xm[(xm - g.joints[i] > 1e-5) & (g.joints[i + 1] - xm > 1e-5)]
+        h = 1e-7
+        fd = (g.radius(xm + h) - g.radius(xm - h)) / (2 * h)
+        assert np.max(np.abs(g.slope(xm) - fd)) < 1e-6
+    assert abs(g.arcLength(g.joints[-1]) - g.length) < 1e-12
+    assert abs(g.wallArea(g.joints[-1]) - g.cumulativeWallAreas[-1]) < 1e-12
+
+def test_conical():
+    checkGeometry(geometry('conical'))
+
+def test_bell80():
+    checkGeometry(geometry('bell80'))
+
+def test_sample():
+    #sample() writes every joint once and no two points further apart along the wall than the step asked for
+    g = geometry('conical')
+    x, y = g.sample(1e-3)
+    assert np.all(np.diff(x) > 0)
+    assert np.max(np.min(np.abs(x[None, :] - g.joints[:, None]), axis=1)) < 1e-12
+    assert np.max(np.diff(g.arcLength(x))) <= 1e-3 + 1e-12
+
+if __name__ == '__main__':
+    test_conical()
+    test_bell80()
+    test_sample()
+    print('contour geometry tests passed')
@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import importlib
+import numpy as np
+'''
+coolant property registry and the fuel heat ThrustLevel.fuelWatts takes from it
+run with python tests/coolantProperties_test.py (or pytest)
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(repoRoot))
+repoName = os.path.basename(repoRoot)
+coolantProperties = importlib.import_module(f'{repoName}.src_cea.fluidProperties.coolantProperties')
+FluidProperties = importlib.import_module(f'{repoName}.src_cea.fluidProperties.fluidProperties').FluidProperties
+ThrustLevel = importlib.import_module(f'{repoName}.src_cea.thrustLevel').ThrustLevel
+
+def fuelLevel(fuel, fuel_delta_t = 100.0):
+    #a ThrustLevel with only what fuelWatts reads, 1 kg/s of fuel and no film cooling
+    level = ThrustLevel.__new__(ThrustLevel)
+    level.fuel, level.fuel_delta_t, level.mdot, level.mr, level.filmCoolingPercent = fuel, fuel_delta_t, 2.0, 1.0, 0.0
+    return level
+
+def test_registryCp():
+    #the fluid's cp and the heat fuelWatts reports come from the same registry table
+    fuel = FluidProperties('RP1')
+    table = coolantProperties.getCoolant('RP-1')
+    assert fuel.coolant is table
+    assert fuel.cp == float(table.cp(fuel.T_inlet))
+    T = np.linspace(fuel.T_inlet, fuel.T_inlet + 100.0, 100001)
+    exact = np.trapezoid(coolantProperties.rp1Model(T)['cp'], T)
+    assert abs(fuelLevel(fuel).fuelWatts() - exact) / exact < 1e-6
+
+def test_tableWithoutCp():
+    #a csv table without a cp column falls back to the constant cp of the fluid's csv
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'CH4.csv')
+        with open(path, 'w') as f:
+            f.write('T,rho\n100,440\n200,300\n')
+        table = coolantProperties.CoolantTable.fromCSV('CH4', path)
+    assert np.isnan(table.cp(150.0))
+    coolantProperties.registerCoolant('CH4', table)
+    try:
+        fuel = FluidProperties('CH4')
+        assert fuel.coolant is table and fuel.cp == 4300.0 # from src_cea/fluidProperties/CH4.csv
+        assert fuelLevel(fuel).fuelWatts() == 4300.0 * 100.0
+    finally:
+        coolantProperties.clearCoolants()
+
+if __name__ == '__main__':
+    test_registryCp()
+    test_tableWithoutCp()
+    print('coolant property tests passed')
@@ -0,0 +1,38 @@
+import os
+import sys
+import subprocess
+'''
+sweeps on IdealGasBackend need neither rocketcea nor a CEA_Obj
+the sweep runs in a fresh interpreter with rocketcea blocked, so the test means the same thing whether or not rocketcea
+is installed. run with python tests/idealGasSweep_test.py (or pytest)
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+repoName = os.path.basename(repoRoot)
+
+sweep = f'''
+import sys, math
+sys.modules['rocketcea'] = None # any rocketcea import raises ImportError
+from {repoName}.src_cea.idealGasBackend import IdealGasBackend
+from {repoName}.src_cea.sweepRunner import runCases
+from {repoName}.src_cea.sweepResults import stationSummary
+from {repoName}.src_cea.engineAnalyzer import EngineAnalyzer
+backend = IdealGasBackend(gam = 1.2, MW = 22.0, Tc = 3300.0)
+base = dict(title = 'ideal gas', fuel = 'RP1', ox = 'LOX', nozzle_type = 'conical', Mr = 1.8, pMaxCham = 39, mdotMax = 1.48, Lstar = 1.02,
+    Dcham = 0.085, wall_temp = 473, r1 = 1, r2 = 1, r3 = 0.4, conv_angle = math.pi / 4, fuel_delta_t = 100, div_angle = math.pi / 12,
+    contourStep = 1e-3, doContours = False, backend = backend, lazy = True)
+results = runCases([dict(base, pMaxCham = 30), dict(base, pMaxCham = 50)], workers = 1, collect = stationSummary)
+assert all(result['ok'] for result in results), [result.get('error') for result in results]
+assert results[1]['result']['thrust'] > results[0]['result']['thrust']
+analyzer = EngineAnalyzer('ideal gas', 'RP1', 'LOX', 'conical', 1.8, [30, 50], 1.48, 1.02, 0.085, 473, 1, 1, 0.4, math.pi / 4, 100,
+    div_angle = math.pi / 12, doContours = False, backend = backend)
+assert analyzer.results.ok.all() and len(analyzer.results) == 2
+'''
+
+def test_idealGasSweepWithoutRocketcea():
+    out = subprocess.run([sys.executable, '-c', sweep], cwd=os.path.dirname(repoRoot), capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+
+if __name__ == '__main__':
+    test_idealGasSweepWithoutRocketcea()
+    print('ideal gas sweep tests passed')
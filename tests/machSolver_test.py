@@ -0,0 +1,56 @@
+import os
+import sys
+import importlib
+import numpy as np
+'''
+area ratio -> mach solver and the per gamma mach tables, run with python tests/machSolver_test.py (or pytest)
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(repoRoot))
+machSolver = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.machSolver')
+machTables = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.machTables')
+
+gams = np.linspace(1.05, 1.67, 32)
+areaRatios = np.concatenate((1 + np.geomspace(1e-8, 1e-2, 20), np.geomspace(1.02, 300, 60))) # crowded next to the throat
+
+def residual(mach, area_ratio, gam):
+    return np.abs(np.log(machSolver.areaRatioFromMach(mach, gam)) - np.log(area_ratio))
+
+def test_solveMachArray():
+    ar, gam = np.broadcast_arrays(areaRatios[None, :], gams[:, None])
+    for supersonic in (False, True):
+        mach, iterations, converged = machSolver.solveMachArray(ar, gam, supersonic = np.full(ar.shape, supersonic))
+        assert converged.all() and iterations.max() <= 10
+        assert np.all(mach > 1) if supersonic else np.all(mach < 1)
+        assert residual(mach, ar, gam).max() < 1e-13
+
+def test_throatIndex():
+    #a converging diverging contour, stations after the smallest area are supersonic and the throat is sonic
+    ar = np.concatenate((areaRatios[::-1], [1.0], areaRatios))
+    mach, iterations, converged = machSolver.solveMachArray(ar, 1.2)
+    throat = len(areaRatios)
+    assert converged.all() and mach[throat] == 1.0
+    assert np.all(mach[:throat] < 1) and np.all(mach[throat + 1:] > 1)
+    assert np.all(np.diff(mach) > 0)
+
+def test_machTable():
+    machTables.clearMachTables()
+    for gam in gams:
+        table = machTables.getMachTable(gam)
+        for supersonic in (False, True):
+            branch = np.full(areaRatios.shape, supersonic)
+            mach, iterations, converged = table.solve(areaRatios, supersonic = branch)
+            assert converged.all()
+            assert residual(mach, areaRatios, gam).max() < 1e-13
+            # inside the table the lookup alone is within its accuracy, past machMax the refinement does the work
+            inside = (mach >= table.machMin) & (mach <= table.machMax)
+            assert np.max(np.abs(table.lookup(areaRatios, branch) - mach)[inside]) < 2 * table.accuracy
+    assert machTables.getMachTable(gams[0]) is machTables.getMachTable(gams[0])
+    machTables.clearMachTables()
+
+if __name__ == '__main__':
+    test_solveMachArray()
+    test_throatIndex()
+    test_machTable()
+    print('mach solver tests passed')
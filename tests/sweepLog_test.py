@@ -0,0 +1,53 @@
+import os
+import sys
+import json
+import tempfile
+import importlib
+'''
+checkpoint log of sweepRunner, a sweep resumed from a log whose last line was cut off by a crash
+run with python tests/sweepLog_test.py (or pytest), needs no rocketcea: the cases that are not in the log fail to build
+an Engine and are logged as failed cases, which is all the resume logic looks at
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(repoRoot))
+sweepRunner = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.sweepRunner')
+
+def tornLog(folder, cases):
+    #a log with case a finished and case b cut off halfway through its line
+    path = os.path.join(folder, 'sweep.jsonl')
+    a = json.dumps({'ok': True, 'result': {'thrust': 1.0}, 'id': sweepRunner.caseId(cases[0]), 'index': 0})
+    b = json.dumps({'ok': True, 'result': {'thrust': 2.0}, 'id': sweepRunner.caseId(cases[1]), 'index': 1})
+    with open(path, 'w') as f:
+        f.write(a + '\n' + b[:len(b) // 2])
+    return path
+
+def test_appendAfterTornLine():
+    cases = [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]
+    with tempfile.TemporaryDirectory() as folder:
+        log = sweepRunner.SweepLog(tornLog(folder, cases))
+        log.append(sweepRunner.caseId(cases[2]), 2, {'ok': True, 'result': {'thrust': 3.0}})
+        log.flush()
+        done = log.read()
+        assert sorted(entry['index'] for entry in done.values()) == [0, 2]
+
+def test_resumeFromTornLog():
+    cases = [{'name': 'a', 'ox': 'LOX', 'fuel': 'RP1'}, {'name': 'b', 'ox': 'LOX', 'fuel': 'RP1'}, {'name': 'c', 'ox': 'LOX', 'fuel': 'RP1'}]
+    with tempfile.TemporaryDirectory() as folder:
+        path = tornLog(folder, cases)
+        results = sweepRunner.runCases(cases, workers = 1, log = path)
+        assert results[0] == {'ok': True, 'result': {'thrust': 1.0}} # read back from the log, not run again
+        assert not results[1]['ok'] and not results[2]['ok'] # run again, the test cases can not build an Engine
+        done = sweepRunner.SweepLog(path).read()
+        assert sorted(entry['index'] for entry in done.values()) == [0, 1, 2]
+        with open(path) as f:
+            lines = f.read().split('\n')
+        assert lines[-1] == '' and all(json.loads(line) for line in lines[:-1])
+        # a second resume runs nothing
+        again = sweepRunner.runCases(cases, workers = 1, log = path)
+        assert [r['ok'] for r in again] == [r['ok'] for r in results]
+
+if __name__ == '__main__':
+    test_appendAfterTornLine()
+    test_resumeFromTornLog()
+    print('sweep log tests passed')
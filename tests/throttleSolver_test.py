@@ -0,0 +1,85 @@
+import os
+import sys
+import math
+import importlib
+'''
+throttle point solver on synthetic exit pressure curves, run with python tests/throttleSolver_test.py (or pytest)
+the CEA case runs on IdealGasBackend so neither rocketcea nor a CEA_Obj is needed
+'''
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(repoRoot))
+throttleSolver = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.throttleSolver')
+idealGasBackend = importlib.import_module(f'{os.path.basename(repoRoot)}.src_cea.idealGasBackend')
+
+class Recorder:
+    #wraps pExit, keeps every Pc it was called with and checks that once the root is bracketed no call leaves the bracket
+    def __init__(self, pExit, target):
+        self.pExit = pExit
+        self.target = target
+        self.calls = []
+        self.lo = self.hi = None
+
+    def __call__(self, Pc):
+        if self.lo is not None and self.hi is not None:
+            assert self.lo < Pc < self.hi, f'{Pc} left the bracket {self.lo}, {self.hi}'
+        p = self.pExit(Pc)
+        self.calls.append(Pc)
+        if p < self.target:
+            self.lo = Pc if self.lo is None else max(self.lo, Pc)
+        else:
+            self.hi = Pc if self.hi is None else min(self.hi, Pc)
+        return p
+
+def solve(pExit, target, guess, **kwargs):
+    recorder = Recorder(pExit, target)
+    Pc, pe, calls = throttleSolver.solveChamberPressure(recorder, target, guess, **kwargs)
+    assert calls == len(recorder.calls)
+    return Pc, pe, calls
+
+def test_proportional():
+    #exit pressure proportional to Pc, the first proportional step is the answer
+    Pc, pe, calls = solve(lambda Pc: 0.016 * Pc, 0.6, 39)
+    assert calls == 2 and abs(pe - 0.6) <= 1e-4 and abs(Pc - 37.5) < 1e-9
+
+def test_guessOnTarget():
+    Pc, pe, calls = solve(lambda Pc: 0.016 * Pc, 0.6, 37.5)
+    assert calls == 1 and Pc == 37.5
+
+def test_curved():
+    #strongly curved, secant steps from one side creep along the bracket unless bisection steps in
+    pExit = lambda Pc: 0.02 * (math.exp(Pc / 8) - 1)
+    for target, guess in ((0.6, 39), (0.6, 10), (5.0, 20)):
+        Pc, pe, calls = solve(pExit, target, guess)
+        assert abs(pe - target) <= 1e-4 and calls <= 20
+        assert abs(Pc - 8 * math.log(target / 0.02 + 1)) < 1e-3
+
+def test_flatTails():
+    #flat on both sides of the root, secant steps from the tails land far outside and bisection has to take over
+    pExit = lambda Pc: 1 + math.atan(Pc - 20)
+    for guess in (40, 5, 200):
+        Pc, pe, calls = solve(pExit, 1.5, guess)
+        assert abs(pe - 1.5) <= 1e-4 and calls <= 20
+
+def test_maxIter():
+    #returns the last point instead of raising when it runs out of iterations
+    Pc, pe, calls = solve(lambda Pc: 1 + math.atan(Pc - 20), 1.5, 200, maxIter = 3)
+    assert calls == 4 and pe == 1 + math.atan(Pc - 20)
+
+def test_idealGasExitPressure():
+    #a frozen ideal gas nozzle has Pe/Pc fixed by the area ratio, so warm started solves take one extra run
+    backend = idealGasBackend.IdealGasBackend(gam = 1.22, MW = 21.5, Tc = 3400.0)
+    pExit = lambda Pc: throttleSolver.exitPressure(None, Pc, 1.8, 8.0, 1, backend)
+    ratio = pExit(39) / 39
+    for target in (0.6, 0.3):
+        Pc, pe, calls = solve(pExit, target, 39)
+        assert calls == 2 and abs(pe - target) <= 1e-4 and abs(Pc - target / ratio) < 1e-6
+
+if __name__ == '__main__':
+    test_proportional()
+    test_guessOnTarget()
+    test_curved()
+    test_flatTails()
+    test_maxIter()
+    test_idealGasExitPressure()
+    print('throttle solver tests passed')